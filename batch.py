@@ -0,0 +1,187 @@
+import argparse
+import json
+import sys
+import time
+from itertools import islice
+from multiprocessing import Pool
+
+from cfg_grammar import RULES_CFG
+from engines import ENGINES, run_engine
+from grammar_binary import cyk_mapped
+from grammar_cache import binary_artifact, load_compiled, load_mapped
+from lexicon import MappedLexicon, lexicon
+from live_grammar import LiveGrammar
+from optimize import format_report
+from profiling import ParseProfile, phase
+from recognizer import recognize
+
+# Workers discard the chart, so the compact triangular one keeps them small
+BATCH_ENGINE = "compact"
+
+# Per-process state, filled once by init_worker
+_worker = {}
+
+def check_mapped(engine=BATCH_ENGINE, optimize=False):
+    """Reject options the mapped parser cannot honor.
+
+    Mapped workers always run the bitset fill of ``cyk_mapped`` over the
+    unoptimized binary grammar, the same chart as the default engine.
+    """
+    if engine != BATCH_ENGINE or optimize:
+        raise ValueError("--mmap parses with the binary grammar and cannot be combined with "
+                         "--engine, --recognize or --optimize")
+
+def init_worker(engine=BATCH_ENGINE, optimize=False, profile=False, mapped=False):
+    """Load the compiled grammar once per worker process.
+
+    The engine ``None`` selects the recognition-only fast path. With
+    ``mapped=True`` the worker only memory-maps the binary grammar artifact,
+    sharing its pages with the other workers.
+    """
+    # A process may be set up more than once (workers=1, server -j 0)
+    _worker.clear()
+    if mapped:
+        _worker["mapped"] = load_mapped()
+        # Known words are looked up in the shared terminal table, not copied
+        _worker["lexicon"] = MappedLexicon(_worker["mapped"])
+    else:
+        _worker["compiled"] = load_compiled(optimize=optimize)
+        _worker["lexicon"] = lexicon(_worker["compiled"])
+    _worker["engine"] = engine
+    _worker["profile"] = profile
+
+def parse_sentence(sentence):
+    """Validate one sentence and return its JSON-ready result."""
+    vocabulary = _worker["lexicon"]
+    words = vocabulary.normalize(sentence.split())
+    unknown = vocabulary.unknown(words)
+    profile = ParseProfile() if _worker.get("profile") else None
+    start = time.perf_counter()
+    if unknown:
+        # A word no rule produces can never be covered, so the parse is skipped
+        is_valid = False
+    elif "mapped" in _worker:
+        with phase(profile, "parse"):
+            is_valid, _ = cyk_mapped(_worker["mapped"], words)
+        if profile is not None:
+            profile.tokens += len(words)
+    elif _worker["engine"] is None:
+        with phase(profile, "recognize"):
+            is_valid = recognize(_worker["compiled"], words)
+        if profile is not None:
+            profile.tokens += len(words)
+    else:
+        is_valid, _ = run_engine(_worker["compiled"], words, _worker["engine"], profile)
+    elapsed = time.perf_counter() - start
+    result = {
+        "sentence": sentence,
+        "valid": is_valid,
+        "tokens": len(words),
+        "time_ms": round(elapsed * 1000, 3),
+    }
+    if unknown:
+        result["unknown"] = {word: vocabulary.suggest(word) for word in unknown}
+    if profile is not None:
+        result["profile"] = profile.as_dict()
+    return result
+
+def apply_edits(edits):
+    """Bring this worker's grammar up to date with a service's edit log.
+
+    ``edits`` is the whole log of ``(action, head, body)`` edits, with the
+    action ``"add"`` or ``"remove"``. Entries this worker has not seen yet
+    are replayed on a ``LiveGrammar`` of ``RULES_CFG``, built on the first
+    edit, so a worker never reloads or recompiles the grammar.
+    """
+    applied = _worker.get("applied", 0)
+    if len(edits) <= applied:
+        return
+    live = _worker.get("live")
+    if live is None:
+        live = _worker["live"] = LiveGrammar(RULES_CFG)
+    for action, head, body in edits[applied:]:
+        if action == "add":
+            live.add_rule(head, body)
+        else:
+            live.remove_rule(head, body)
+    _worker["applied"] = len(edits)
+    _worker["compiled"] = live.compiled
+    _worker["lexicon"] = lexicon(live.compiled)
+
+def parse_batch(sentences, edits=()):
+    """Validate a list of sentences in one worker task, after any new grammar edits."""
+    apply_edits(edits)
+    return [parse_sentence(sentence) for sentence in sentences]
+
+def read_sentences(stream):
+    """Yield non-empty, stripped lines from a text stream."""
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield line
+
+def validate_stream(sentences, workers=None, engine=BATCH_ENGINE, ordered=False, window=1024, chunksize=32,
+                    optimize=False, profile=False, mapped=False):
+    """Yield one result per sentence, parsing across a process pool.
+
+    Sentences are submitted ``window`` at a time so memory stays bounded no
+    matter how long the input is.
+    """
+    # Warm the on-disk artifacts so workers load them instead of converting
+    if mapped:
+        check_mapped(engine, optimize)
+        binary_artifact()
+    else:
+        load_compiled(optimize=optimize)
+    sentences = iter(sentences)
+    if workers == 1:
+        init_worker(engine, optimize, profile, mapped)
+        for sentence in sentences:
+            yield parse_sentence(sentence)
+        return
+
+    with Pool(workers, initializer=init_worker, initargs=(engine, optimize, profile, mapped)) as pool:
+        imap = pool.imap if ordered else pool.imap_unordered
+        while True:
+            batch = list(islice(sentences, window))
+            if not batch:
+                break
+            yield from imap(parse_sentence, batch, chunksize)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate a corpus of Balinese sentences, one per line.")
+    parser.add_argument("input", nargs="?", default="-", help="input file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file, or - for stdout")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--engine", default=BATCH_ENGINE, choices=sorted(ENGINES))
+    parser.add_argument("--ordered", action="store_true", help="keep output in input order")
+    parser.add_argument("--window", type=int, default=1024, help="sentences in flight at once")
+    parser.add_argument("--chunksize", type=int, default=32, help="sentences per worker task")
+    parser.add_argument("--optimize", action="store_true", help="parse with the pruned and merged grammar")
+    parser.add_argument("--profile", action="store_true", help="add phase timings and counters to each result")
+    parser.add_argument("--recognize", action="store_true", help="only decide validity, without building charts")
+    parser.add_argument("--mmap", action="store_true", help="memory-map the binary grammar in every worker")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    engine = None if args.recognize else args.engine
+    if args.mmap:
+        try:
+            check_mapped(engine, args.optimize)
+        except ValueError as exc:
+            parser.error(str(exc))
+    if args.optimize:
+        print(f"optimized grammar: {format_report(load_compiled(optimize=True).optimize_report)}", file=sys.stderr)
+    try:
+        for result in validate_stream(read_sentences(source), args.workers, engine,
+                                      args.ordered, args.window, args.chunksize, args.optimize, args.profile, args.mmap):
+            sink.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+if __name__ == "__main__":
+    main()
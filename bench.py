@@ -0,0 +1,258 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from cfg_grammar import RULES_CFG
+from cnf import convert_to_cnf, remove_epsilon_productions, remove_unit_productions
+from cyk import build_display_table, compile_grammar, cyk_indexed, display_table_html, extract_tree
+from engines import ENGINES, run_engine
+from forest import count_derivations
+
+class SentenceGenerator:
+    """Random sentences of an exact length, derived from a CFG."""
+
+    def __init__(self, cfg, start='K', max_length=200, seed=0):
+        self.cfg = cfg
+        self.start = start
+        self.max_length = max_length
+        self.random = random.Random(seed)
+        # Achievable lengths per symbol as a bitset: bit L set if L words fit
+        self.mask = (1 << (max_length + 1)) - 1
+        self.lengths = {head: 0 for head in cfg}
+        changed = True
+        while changed:
+            changed = False
+            for head, bodies in cfg.items():
+                lengths = self.lengths[head]
+                for body in bodies:
+                    lengths |= self._body_lengths(body)
+                if lengths != self.lengths[head]:
+                    self.lengths[head] = lengths
+                    changed = True
+
+    def _symbol_lengths(self, symbol):
+        return self.lengths[symbol] if symbol in self.cfg else 0b10
+
+    def _body_lengths(self, body):
+        lengths = 1  # the empty body has length 0
+        for symbol in body:
+            lengths = self._add(lengths, self._symbol_lengths(symbol))
+        return lengths
+
+    def _add(self, a, b):
+        """Sumset of two length bitsets, capped at max_length."""
+        total = 0
+        shift = 0
+        while a:
+            if a & 1:
+                total |= b << shift
+            a >>= 1
+            shift += 1
+        return total & self.mask
+
+    def can_generate(self, length, symbol=None):
+        return bool(self._symbol_lengths(symbol or self.start) >> length & 1)
+
+    def generate(self, length, symbol=None):
+        """Words of a random derivation of exactly ``length`` words, or None."""
+        symbol = symbol or self.start
+        if length > self.max_length or not self.can_generate(length, symbol):
+            return None
+        words = []
+        # Explicit stack of (symbol, length) so long sentences don't recurse deeply
+        stack = [(symbol, length)]
+        while stack:
+            symbol, length = stack.pop()
+            if symbol not in self.cfg:
+                words.append(symbol)
+                continue
+            bodies = [body for body in self.cfg[symbol] if self._body_lengths(body) >> length & 1]
+            body = self.random.choice(bodies)
+            parts = self._split(body, length)
+            stack.extend(reversed(list(zip(body, parts))))
+        return words
+
+    def _split(self, body, length):
+        """Randomly assign a feasible length to each symbol of a body."""
+        # suffix[i] = achievable lengths of body[i:]
+        suffix = [1] * (len(body) + 1)
+        for i in range(len(body) - 1, -1, -1):
+            suffix[i] = self._add(self._symbol_lengths(body[i]), suffix[i+1])
+        parts = []
+        for i, symbol in enumerate(body):
+            own = self._symbol_lengths(symbol)
+            options = [m for m in range(length + 1) if own >> m & 1 and suffix[i+1] >> (length - m) & 1]
+            part = self.random.choice(options)
+            parts.append(part)
+            length -= part
+        return parts
+
+    def mutate(self, words, compiled, attempts=50):
+        """An ungrammatical variant of ``words`` with the same length, or None."""
+        vocabulary = sorted(compiled.lexical)
+        for _ in range(attempts):
+            candidate = list(words)
+            if self.random.random() < 0.5 and len(candidate) > 1:
+                i, j = self.random.sample(range(len(candidate)), 2)
+                candidate[i], candidate[j] = candidate[j], candidate[i]
+            else:
+                candidate[self.random.randrange(len(candidate))] = self.random.choice(vocabulary)
+            if not cyk_indexed(compiled, candidate)[0]:
+                return candidate
+        return None
+
+def scale_grammar(cfg, lexicon_factor=1, rule_factor=1):
+    """A larger grammar with the same structure, for stress tests.
+
+    Every lexical category gets ``lexicon_factor`` times as many synthetic
+    words, and every phrase category gets ``rule_factor - 1`` renamed copies
+    that parents can use interchangeably with the original.
+    """
+    lexical = {head for head, bodies in cfg.items() if all(len(b) == 1 and b[0] not in cfg for b in bodies)}
+    scaled = {head: [list(body) for body in bodies] for head, bodies in cfg.items()}
+    for head in lexical:
+        base = len(cfg[head])
+        for n in range(base * (lexicon_factor - 1)):
+            scaled[head].append([f"{head.lower()}_{n}"])
+
+    phrases = [head for head in cfg if head not in lexical]
+    for copy in range(1, rule_factor):
+        for head in phrases:
+            scaled[f"{head}_{copy}"] = [list(body) for body in cfg[head]]
+        for head in list(scaled):
+            extra = []
+            for body in scaled[head]:
+                for i, symbol in enumerate(body):
+                    if symbol in phrases:
+                        extra.append(body[:i] + [f"{symbol}_{copy}"] + body[i+1:])
+            scaled[head].extend(extra)
+    return scaled
+
+def _time(fn, repeat):
+    """Median wall time of ``fn`` over ``repeat`` runs."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+# Modules whose cold import time is tracked; web needs streamlit installed
+STARTUP_MODULES = ("engines", "web")
+
+def _import_time(module, repeat):
+    """Median time to import ``module`` in a fresh interpreter, or None if it fails."""
+    code = f"import time; started = time.perf_counter(); import {module}; print(time.perf_counter() - started)"
+    samples = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        if result.returncode != 0:
+            return None
+        samples.append(float(result.stdout.split()[-1]))
+    return statistics.median(samples)
+
+def _render(words, parse_table):
+    return display_table_html(build_display_table(words, parse_table))
+
+def run_benchmarks(cfg=None, lengths=(5, 10, 20, 50), engines=("indexed", "bitset"), repeat=3, seed=0,
+                   lexicon_factor=1, rule_factor=1):
+    """Time the pipeline phases; returns a flat ``{metric: seconds}`` dict."""
+    cfg = scale_grammar(RULES_CFG if cfg is None else cfg, lexicon_factor, rule_factor)
+    results = {}
+
+    for module in STARTUP_MODULES:
+        seconds = _import_time(module, repeat)
+        if seconds is None:
+            print(f"could not import {module}; skipping its startup time", file=sys.stderr)
+            continue
+        results[f"startup/import/{module}"] = seconds
+
+    cnf = None
+    def convert():
+        nonlocal cnf
+        cnf = convert_to_cnf(remove_unit_productions(remove_epsilon_productions(cfg)))
+    results["convert_to_cnf"] = _time(convert, repeat)
+    compiled = compile_grammar(cnf, source=cfg)
+
+    generator = SentenceGenerator(cfg, max_length=max(lengths), seed=seed)
+    for length in lengths:
+        valid = generator.generate(length)
+        if valid is None:
+            print(f"no grammatical sentence of length {length}", file=sys.stderr)
+            continue
+        cases = {"valid": valid}
+        invalid = generator.mutate(valid, compiled)
+        if invalid is not None:
+            cases["invalid"] = invalid
+
+        for kind, words in cases.items():
+            for engine in engines:
+                results[f"parse/{engine}/{kind}/{length}"] = _time(lambda: run_engine(compiled, words, engine), repeat)
+
+        words = cases["valid"]
+        _, parse_table, back = cyk_indexed(compiled, words, backpointers=True)
+        results[f"tree/valid/{length}"] = _time(
+            lambda: (count_derivations(back, compiled.start), extract_tree(back, words, compiled.start)), repeat)
+        results[f"render/valid/{length}"] = _time(lambda: _render(words, parse_table), repeat)
+    return results
+
+def compare(results, baseline, threshold):
+    """Metrics that got slower than ``threshold`` times their baseline."""
+    regressions = {}
+    for metric, seconds in results.items():
+        before = baseline.get(metric)
+        if before and seconds > before * threshold:
+            regressions[metric] = (before, seconds)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark CNF conversion, parsing, tree building and rendering.")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[5, 10, 20, 50], help="sentence lengths (5-200)")
+    parser.add_argument("--engines", nargs="+", default=["indexed", "bitset"], choices=sorted(ENGINES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--lexicon-scale", type=int, default=1, help="multiply the size of each lexical category")
+    parser.add_argument("--rule-scale", type=int, default=1, help="add renamed copies of each phrase category")
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio that counts as a regression")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(lengths=args.lengths, engines=args.engines, repeat=args.repeat, seed=args.seed,
+                             lexicon_factor=args.lexicon_scale, rule_factor=args.rule_scale)
+    for metric, seconds in results.items():
+        print(f"{metric:<40} {seconds * 1000:12.3f} ms")
+
+    meta = {
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "lexicon_scale": args.lexicon_scale,
+        "rule_scale": args.rule_scale,
+    }
+    if args.output:
+        report = {"meta": meta, "results": results}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        for key in ("seed", "lexicon_scale", "rule_scale"):
+            if baseline.get("meta", {}).get(key) != meta[key]:
+                print(f"warning: baseline {key} differs from this run", file=sys.stderr)
+        regressions = compare(results, baseline["results"], args.threshold)
+        for metric, (before, after) in regressions.items():
+            print(f"REGRESSION {metric}: {before * 1000:.3f} ms -> {after * 1000:.3f} ms", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -20,4 +20,9 @@ RULES_CFG = {
     "V": [["majajal"], ["malajah"], ["mekeber"], ["ngelangi"], ["maca"], ["ngangge"], ["dadi"]],
     "Prep": [["di"], ["ring"], ["mukak"], ["ke"], ["uli"]],
     "Adj": [["galak"], ["gede-gede"], ["bagus"], ["gelem"], ["mati"], ["ngambul"], ["dingin"], ["galak-galak"], ["mokoh-mokoh"], ["berek"], ["cenik"], ["dalem"], ["lantang"], ["mebrarakan"], ["selem"], ["poleng"]]
-}
\ No newline at end of file
+}
+
+# Optional rule probabilities for weighted (Viterbi) parsing:
+# (head, tuple(body)) -> probability, e.g. {("NP", ("NP", "AdjP")): 0.2}.
+# Unlisted rules get 1 / (number of bodies of their head).
+RULE_SCORES = {}
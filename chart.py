@@ -0,0 +1,95 @@
+from array import array
+
+from cyk_bitset import combine_cell
+
+EMPTY = frozenset()
+
+class TriangularChart:
+    """CYK chart holding only the upper triangle (j >= i) in one flat array.
+
+    Cells are bitmasks over the symbol IDs of a ``BitsetGrammar``; with at
+    most 64 symbols they are packed into an ``array('Q')`` of 8 bytes per
+    cell. ``chart[i][j]`` decodes a cell into a shared frozenset, so code
+    written for ``parse_table[i][j]`` sets keeps working.
+    """
+
+    def __init__(self, n, bits):
+        self.n = n
+        self.bits = bits
+        size = n * (n + 1) // 2
+        self.cells = array('Q', bytes(8 * size)) if len(bits.symbols) <= 64 else [0] * size
+
+    def index(self, i, j):
+        """Position of span [i][j] in the flat array (row-major, j >= i)."""
+        return i * self.n - i * (i - 1) // 2 + (j - i)
+
+    def get(self, i, j):
+        return self.cells[self.index(i, j)]
+
+    def set(self, i, j, mask):
+        self.cells[self.index(i, j)] = mask
+
+    def cell(self, i, j):
+        """Decoded set of nonterminal names for span [i][j]."""
+        if j < i:
+            return EMPTY
+        return self.bits.decode(self.cells[self.index(i, j)])
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.n:
+            raise IndexError(i)
+        return _Row(self, i)
+
+    def __len__(self):
+        return self.n
+
+    def __iter__(self):
+        return (_Row(self, i) for i in range(self.n))
+
+    def nbytes(self):
+        """Approximate memory held by the cell storage."""
+        if isinstance(self.cells, array):
+            return self.cells.itemsize * len(self.cells)
+        return 8 * len(self.cells)
+
+class _Row:
+    """``chart[i]``: lets ``chart[i][j]`` read like a list of lists of sets."""
+
+    __slots__ = ("chart", "i")
+
+    def __init__(self, chart, i):
+        self.chart = chart
+        self.i = i
+
+    def __getitem__(self, j):
+        if not 0 <= j < self.chart.n:
+            raise IndexError(j)
+        return self.chart.cell(self.i, j)
+
+    def __len__(self):
+        return self.chart.n
+
+    def __iter__(self):
+        return (self.chart.cell(self.i, j) for j in range(self.chart.n))
+
+def cyk_compact(bits, words):
+    """Bitset CYK that fills a TriangularChart instead of an n x n table."""
+    n = len(words)
+    chart = TriangularChart(n, bits)
+    if n == 0:
+        return False, chart
+
+    cells = chart.cells
+    index = chart.index
+    for i in range(n):
+        cells[index(i, i)] = bits.lexical.get(words[i], 0)
+
+    by_left = bits.by_left
+    for length in range(2, n + 1):
+        for i in range(n - length + 1):
+            j = i + length - 1
+            row = index(i, i)
+            lefts = cells[row:row + length - 1]
+            rights = [cells[index(k + 1, j)] for k in range(i, j)]
+            cells[row + length - 1] = combine_cell(lefts, rights, by_left)
+    return bool(cells[index(0, n - 1)] & bits.start_bit), chart
@@ -10,71 +10,102 @@ def get_terminals(grammar):
                     terminals.add(symbol)
     return terminals
 
+def find_nullable(cfg):
+    """Find nullable symbols with a worklist over symbol occurrences."""
+    # For every symbol, the rules whose body mentions it
+    occurrences = {}
+    remaining = []
+    nullable = set()
+    worklist = []
+    for head, bodies in cfg.items():
+        for body in bodies:
+            rule = len(remaining)
+            remaining.append(len(body))
+            if not body and head not in nullable:
+                nullable.add(head)
+                worklist.append(head)
+            for symbol in body:
+                occurrences.setdefault(symbol, []).append((rule, head))
+
+    while worklist:
+        symbol = worklist.pop()
+        for rule, head in occurrences.get(symbol, ()):
+            remaining[rule] -= 1
+            if remaining[rule] == 0 and head not in nullable:
+                nullable.add(head)
+                worklist.append(head)
+    return nullable
+
 def remove_epsilon_productions(cfg):
     """Remove epsilon productions from the grammar."""
-    nullable = set()
-    
-    # Find nullable symbols
-    changed = True
-    while changed:
-        changed = False
-        for head, bodies in cfg.items():
-            if head not in nullable:
-                for body in bodies:
-                    if len(body) == 0 or all(symbol in nullable for symbol in body):
-                        nullable.add(head)
-                        changed = True
-                        break
-    
-    # Generate new rules
+    nullable = find_nullable(cfg)
+
+    # Generate new rules; only bodies with nullable symbols need subsets
     new_cfg = {}
     for head, bodies in cfg.items():
-        new_bodies = set()
+        new_bodies = {}
         for body in bodies:
-            if body:  # Skip empty productions
-                indices = [i for i, symbol in enumerate(body) if symbol in nullable]
-                for r in range(len(indices) + 1):
-                    for subset in combinations(indices, r):
-                        new_body = tuple(sym for i, sym in enumerate(body) if i not in subset)
-                        if new_body:  # Only add non-empty productions
-                            new_bodies.add(new_body)
+            if not body:
+                continue
+            indices = [i for i, symbol in enumerate(body) if symbol in nullable]
+            if not indices:
+                new_bodies.setdefault(tuple(body), None)
+                continue
+            for r in range(len(indices) + 1):
+                for subset in combinations(indices, r):
+                    dropped = set(subset)
+                    new_body = tuple(sym for i, sym in enumerate(body) if i not in dropped)
+                    if new_body:  # Only add non-empty productions
+                        new_bodies.setdefault(new_body, None)
         new_cfg[head] = [list(body) for body in new_bodies]
     return new_cfg
 
-def remove_unit_productions(cfg):
-    """Remove unit productions from the grammar."""
-    # Get all unit pairs
-    unit_pairs = set()
+def unit_closure(cfg):
+    """Map every head to the nonterminals reachable through unit productions."""
+    edges = {head: [] for head in cfg}
     for head, bodies in cfg.items():
         for body in bodies:
             if len(body) == 1 and body[0] in cfg:
-                unit_pairs.add((head, body[0]))
-    
-    # Add transitive unit pairs
-    changed = True
-    while changed:
-        changed = False
-        for a, b in list(unit_pairs):
-            for c in [p[1] for p in unit_pairs if p[0] == b]:
-                if (a, c) not in unit_pairs:
-                    unit_pairs.add((a, c))
-                    changed = True
-    
+                edges[head].append(body[0])
+
+    closure = {}
+    for head in cfg:
+        # Depth-first search over unit edges
+        reached = []
+        seen = set()
+        stack = list(edges[head])
+        while stack:
+            symbol = stack.pop()
+            if symbol in seen:
+                continue
+            seen.add(symbol)
+            reached.append(symbol)
+            stack.extend(edges[symbol])
+        closure[head] = reached
+    return closure
+
+def remove_unit_productions(cfg):
+    """Remove unit productions from the grammar."""
+    closure = unit_closure(cfg)
+
+    def non_unit(bodies):
+        return [body for body in bodies if len(body) != 1 or body[0] not in cfg]
+
     # Create new grammar
-    new_cfg = {head: [] for head in cfg}
+    new_cfg = {}
     for head, bodies in cfg.items():
-        # Add non-unit productions
-        for body in bodies:
-            if len(body) != 1 or (len(body) == 1 and body[0] not in cfg):
-                new_cfg[head].append(body)
-        
+        own = non_unit(bodies)
+        seen = {tuple(body) for body in own}
+        new_bodies = list(own)
+
         # Add productions from unit pairs
-        for pair in unit_pairs:
-            if pair[0] == head:
-                for body in cfg[pair[1]]:
-                    if len(body) != 1 or (len(body) == 1 and body[0] not in cfg):
-                        if body not in new_cfg[head]:
-                            new_cfg[head].append(body)
+        for target in closure[head]:
+            for body in non_unit(cfg[target]):
+                key = tuple(body)
+                if key not in seen:
+                    seen.add(key)
+                    new_bodies.append(body)
+        new_cfg[head] = new_bodies
     return new_cfg
 
 def convert_to_cnf(cfg):
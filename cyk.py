@@ -1,3 +1,6 @@
+import html
+import time
+
 def cyk_algorithm(grammar, words):
     n = len(words)
     # Initialize parse table
@@ -24,8 +27,176 @@ def cyk_algorithm(grammar, words):
                                 parse_table[i][j].add(head)
     return 'K' in parse_table[0][n-1], parse_table
 
+class CompiledGrammar:
+    """CNF grammar indexed for fast CYK lookups."""
+
+    def __init__(self, cnf, start='K', source=None):
+        self.cnf = cnf
+        self.start = start
+        self.source = source
+        self.fingerprint = None
+        # Optimized grammars: kept head -> original heads it stands for,
+        # and the grammar size before and after (see optimize_grammar)
+        self.members = None
+        self.optimize_report = None
+        # Engine-specific structures built from this grammar, keyed by name
+        self.derived = {}
+        # word -> heads, (B, C) -> heads, B -> {C: heads}
+        self.lexical = {}
+        self.binary = {}
+        self.by_left = {}
+        for head, bodies in cnf.items():
+            for body in bodies:
+                if len(body) == 1:
+                    self.lexical.setdefault(body[0], set()).add(head)
+                elif len(body) == 2:
+                    B, C = body
+                    self.binary.setdefault((B, C), set()).add(head)
+                    self.by_left.setdefault(B, {}).setdefault(C, set()).add(head)
+
+def compile_grammar(cnf, start='K', source=None):
+    """Build the lookup tables for a CNF grammar once."""
+    return CompiledGrammar(cnf, start, source)
+
+def cyk_steps(compiled, words, backpointers=False, profile=None):
+    """Generator form of cyk_indexed that yields after every span length.
+
+    Yields ``(length, parse_table, back)`` once all spans of ``length`` words
+    are filled, starting with the lexical row at length 1. The tables are
+    the same objects at every step and complete after the last one; ``back``
+    is None unless ``backpointers`` is set. Nothing is yielded for an empty
+    sentence.
+    """
+    n = len(words)
+    if n == 0:
+        return
+    parse_table = [[set() for j in range(n)] for i in range(n)]
+    back = [[{} for j in range(n)] for i in range(n)] if backpointers else None
+
+    # Fill terminal rules
+    started = time.perf_counter() if profile else 0.0
+    lexical = compiled.lexical
+    for i in range(n):
+        heads = lexical.get(words[i], ())
+        parse_table[i][i].update(heads)
+        if backpointers:
+            back[i][i] = dict.fromkeys(heads)
+    if profile:
+        profile.phases["lexical"] = profile.phases.get("lexical", 0.0) + time.perf_counter() - started
+    yield 1, parse_table, back
+
+    # Only combine nonterminals present in the two sub-spans
+    by_left = compiled.by_left
+    for length in range(2, n + 1):
+        started = time.perf_counter() if profile else 0.0
+        checks = combinations = 0
+        for i in range(n - length + 1):
+            j = i + length - 1
+            cell = parse_table[i][j]
+            cell_back = back[i][j] if backpointers else None
+            for k in range(i, j):
+                right = parse_table[k+1][j]
+                if not right:
+                    continue
+                for B in parse_table[i][k]:
+                    rules = by_left.get(B)
+                    if not rules:
+                        continue
+                    if len(rules) < len(right):
+                        checks += len(rules)
+                        matches = ((C, heads) for C, heads in rules.items() if C in right)
+                    else:
+                        checks += len(right)
+                        matches = ((C, rules[C]) for C in right if C in rules)
+                    for C, heads in matches:
+                        combinations += 1
+                        cell |= heads
+                        if backpointers:
+                            for head in heads:
+                                cell_back.setdefault(head, []).append((k, B, C))
+        if profile:
+            # Time spent suspended at a yield is not counted
+            profile.phases["spans"] = profile.phases.get("spans", 0.0) + time.perf_counter() - started
+            profile.rule_checks += checks
+            profile.combinations += combinations
+        yield length, parse_table, back
+    if profile:
+        profile.tokens += n
+        profile.counted = True
+        profile.populated_cells += sum(1 for row in parse_table for cell in row if cell)
+
+def cyk_indexed(compiled, words, backpointers=False, profile=None):
+    """CYK over a compiled grammar; returns the same tables as cyk_algorithm.
+
+    With ``backpointers=True`` a third value is returned: ``back[i][j]`` maps
+    each head in the cell to its ``(k, B, C)`` derivations, or to ``None``
+    for a lexical entry on the diagonal. A ``ParseProfile`` passed as
+    ``profile`` receives phase timings and counters.
+    """
+    parse_table, back = [], [] if backpointers else None
+    for _, parse_table, back in cyk_steps(compiled, words, backpointers, profile):
+        pass
+    is_valid = bool(words) and compiled.start in parse_table[0][-1]
+    return (is_valid, parse_table, back) if backpointers else (is_valid, parse_table)
+
+def combine_cells(cell, left, right, by_left):
+    """Add to ``cell`` every head A of a rule A -> B C with B in left, C in right."""
+    if not right:
+        return cell
+    for B in left:
+        rules = by_left.get(B)
+        if not rules:
+            continue
+        if len(rules) < len(right):
+            for C, heads in rules.items():
+                if C in right:
+                    cell |= heads
+        else:
+            for C in right:
+                heads = rules.get(C)
+                if heads:
+                    cell |= heads
+    return cell
+
+def extract_tree(back, words, symbol='K', i=0, j=None):
+    """Follow the first backpointer of each node to build one derivation.
+
+    Trees are ``(symbol, i, j, children)`` tuples, where ``children`` is the
+    word for a leaf and a pair of subtrees otherwise.
+    """
+    if j is None:
+        j = len(words) - 1
+    if j < 0 or symbol not in back[i][j]:
+        return None
+    if i == j:
+        return (symbol, i, j, words[i])
+    k, B, C = back[i][j][symbol][0]
+    return (symbol, i, j, (extract_tree(back, words, B, i, k), extract_tree(back, words, C, k+1, j)))
+
 def format_cell_content(cell_set):
     """Format the cell content for display."""
     if not cell_set:
         return "∅"
-    return "{" + ", ".join(sorted(cell_set)) + "}"
\ No newline at end of file
+    return "{" + ", ".join(sorted(cell_set)) + "}"
+
+def build_display_table(words, parse_table, filled=None):
+    """Arrange the chart as the triangular display grid, words in the last row.
+
+    Pass ``filled`` to show only spans of up to that many words, for a
+    chart that is still being filled.
+    """
+    n = len(words)
+    display_table = [[""] * n for _ in range(n + 1)]
+    display_table[n] = list(words)
+    for i in range(n if filled is None else filled):
+        for j in range(n - i):
+            display_table[n-1-i][j] = format_cell_content(parse_table[j][j + i])
+    return display_table
+
+def display_table_html(display_table, classes='dataframe'):
+    """Render a display grid as an HTML table, escaping every cell."""
+    rows = []
+    for row in display_table:
+        cells = "".join(f"<td>{html.escape(cell)}</td>" for cell in row)
+        rows.append(f"<tr>{cells}</tr>")
+    return f'<table class="{classes}"><tbody>{"".join(rows)}</tbody></table>'
@@ -0,0 +1,137 @@
+import importlib.util
+
+# NumPy is optional and only cyk_numpy needs it, so it is imported on first use
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+def _numpy():
+    if not HAS_NUMPY:
+        raise ImportError("cyk_numpy requires NumPy")
+    import numpy
+    return numpy
+
+class BitsetGrammar:
+    """Compiled grammar with nonterminals mapped to integer IDs / bit positions."""
+
+    def __init__(self, compiled):
+        symbols = set(compiled.cnf)
+        for heads in compiled.lexical.values():
+            symbols |= heads
+        for (B, C), heads in compiled.binary.items():
+            symbols |= heads
+            symbols.add(B)
+            symbols.add(C)
+        self.compiled = compiled
+        self.symbols = sorted(symbols)
+        self.ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.start_bit = 1 << self.ids[compiled.start] if compiled.start in self.ids else 0
+        self.lexical = {word: self.encode(heads) for word, heads in compiled.lexical.items()}
+        # by_left[B] = [(bit of C, mask of heads), ...]
+        self.by_left = [[] for _ in self.symbols]
+        for B, rules in compiled.by_left.items():
+            self.by_left[self.ids[B]] = [(1 << self.ids[C], self.encode(heads)) for C, heads in rules.items()]
+        self._decoded = {0: frozenset()}
+
+    def encode(self, cell):
+        """Turn a set of nonterminal names into a bitmask."""
+        mask = 0
+        for symbol in cell:
+            mask |= 1 << self.ids[symbol]
+        return mask
+
+    def decode(self, mask):
+        """Turn a bitmask back into a set of nonterminal names."""
+        cell = self._decoded.get(mask)
+        if cell is None:
+            cell = frozenset(self.symbols[i] for i in range(mask.bit_length()) if mask >> i & 1)
+            self._decoded[mask] = cell
+        return cell
+
+def bitset_grammar(compiled):
+    """Return the bitset form of a compiled grammar, building it once."""
+    bits = compiled.derived.get("bitset")
+    if bits is None:
+        bits = compiled.derived["bitset"] = BitsetGrammar(compiled)
+    return bits
+
+def combine_cell(lefts, rights, by_left):
+    """OR together the heads of all B C rules over paired left/right masks."""
+    result = 0
+    for left, right in zip(lefts, rights):
+        if not right:
+            continue
+        while left:
+            low = left & -left
+            left ^= low
+            for c_bit, heads in by_left[low.bit_length() - 1]:
+                if right & c_bit:
+                    result |= heads
+    return result
+
+def cyk_bitset(bits, words):
+    """CYK where every cell is an integer bitmask over nonterminal IDs."""
+    n = len(words)
+    table = [[0] * n for _ in range(n)]
+    if n == 0:
+        return False, table
+
+    for i in range(n):
+        table[i][i] = bits.lexical.get(words[i], 0)
+
+    by_left = bits.by_left
+    for length in range(2, n + 1):
+        for i in range(n - length + 1):
+            j = i + length - 1
+            row = table[i]
+            table[i][j] = combine_cell(row[i:j], [table[k+1][j] for k in range(i, j)], by_left)
+    return bool(table[0][n-1] & bits.start_bit), table
+
+def decode_table(bits, table):
+    """Decode a bitmask chart into sets usable by format_cell_content."""
+    return [[bits.decode(mask) for mask in row] for row in table]
+
+def rule_tensor(bits):
+    """Dense (B*C, A) matrix of binary rules, built once per grammar."""
+    tensor = bits.compiled.derived.get("rule_tensor")
+    if tensor is None:
+        np = _numpy()
+        m = len(bits.symbols)
+        tensor = np.zeros((m * m, m), dtype=np.float32)
+        for (B, C), heads in bits.compiled.binary.items():
+            for head in heads:
+                tensor[bits.ids[B] * m + bits.ids[C], bits.ids[head]] = 1
+        bits.compiled.derived["rule_tensor"] = tensor
+    return tensor
+
+def cyk_numpy(bits, words):
+    """CYK with boolean cell vectors; all split points of a span in one product."""
+    np = _numpy()
+    n = len(words)
+    m = len(bits.symbols)
+    chart = np.zeros((n, n, m), dtype=bool)
+    if n == 0:
+        return False, chart
+
+    for i in range(n):
+        mask = bits.lexical.get(words[i], 0)
+        for s in range(mask.bit_length()):
+            if mask >> s & 1:
+                chart[i, i, s] = True
+
+    tensor = rule_tensor(bits)
+    for length in range(2, n + 1):
+        for i in range(n - length + 1):
+            j = i + length - 1
+            # Rows are split points k: left = [i][k], right = [k+1][j]
+            left = chart[i, i:j, :].astype(np.float32)
+            right = chart[i+1:j+1, j, :].astype(np.float32)
+            pairs = left.T @ right
+            chart[i, j, :] = (pairs.reshape(-1) @ tensor) > 0
+
+    start = bits.ids.get(bits.compiled.start)
+    return start is not None and bool(chart[0, n-1, start]), chart
+
+def decode_array(bits, chart):
+    """Decode a NumPy boolean chart into sets usable by format_cell_content."""
+    np = _numpy()
+    n = chart.shape[0]
+    return [[frozenset(bits.symbols[s] for s in np.flatnonzero(chart[i, j])) for j in range(n)] for i in range(n)]
@@ -0,0 +1,175 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+from cyk import compile_grammar
+from cfg_grammar import RULES_CFG
+from engines import ENGINES, INEXACT_CHARTS, RECOGNIZERS
+from grammar_binary import MappedGrammar, cyk_mapped, write_binary_grammar
+from grammar_cache import load_cnf
+from parallel import ParallelFiller
+
+ORACLE = "reference"
+
+def _parallel_pool(kind):
+    # The registered engine only uses its pool from PARALLEL_THRESHOLD words,
+    # far longer than fuzzed sentences, so force the pool for every length
+    def engine(compiled, words):
+        with ParallelFiller(compiled, workers=2, kind=kind, threshold=0) as filler:
+            return filler.parse(words)
+    return engine
+
+def _mapped(compiled, words):
+    # The parser of --mmap workers, over a binary grammar written for this case
+    n = len(words)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "grammar.bin")
+        write_binary_grammar(compiled, path)
+        grammar = MappedGrammar(path)
+        try:
+            is_valid, chart = cyk_mapped(grammar, words)
+            # Cells are decoded from the mapping, so read them before it closes
+            table = [[chart[i][j] for j in range(n)] for i in range(n)]
+        finally:
+            grammar.close()
+    return is_valid, table
+
+# Engines only the harness runs: name -> function(compiled, words) like ENGINES
+HARNESS_ENGINES = {
+    "parallel-thread": _parallel_pool("thread"),
+    "parallel-process": _parallel_pool("process"),
+    "mapped": _mapped,
+}
+
+def random_cnf_grammar(rng, nonterminals=5, terminals=4, binary_rules=8, lexical_rules=6, start='K'):
+    """A random CNF grammar over symbols K, A, B, ... and terminals a, b, ..."""
+    heads = [start] + [chr(ord('A') + i) for i in range(nonterminals - 1)]
+    words = [chr(ord('a') + i) for i in range(terminals)]
+    cnf = {head: [] for head in heads}
+    for _ in range(lexical_rules):
+        cnf[rng.choice(heads)].append([rng.choice(words)])
+    for _ in range(binary_rules):
+        cnf[rng.choice(heads)].append([rng.choice(heads), rng.choice(heads)])
+    return cnf, words
+
+def chart_differences(expected, actual, n):
+    """Cells ``(i, j, expected, actual)`` where two charts disagree."""
+    differences = []
+    for i in range(n):
+        for j in range(i, n):
+            want, got = set(expected[i][j]), set(actual[i][j])
+            if want != got:
+                differences.append((i, j, want, got))
+    return differences
+
+def check(cnf, words, engine, source=None):
+    """Compare one engine to the oracle; returns a description or None.
+
+    ``source`` is the CFG the CNF came from, for engines that parse it
+    directly; a CNF grammar is its own source otherwise.
+    """
+    compiled = compile_grammar(cnf, source=source or cnf)
+    want_valid, want_table = ENGINES[ORACLE](compiled, words)
+    try:
+        if engine in RECOGNIZERS:
+            got_valid, got_table = RECOGNIZERS[engine](compiled, words), None
+        else:
+            got_valid, got_table = {**ENGINES, **HARNESS_ENGINES}[engine](compiled, words)
+    except Exception as exc:  # a crash is a disagreement too
+        return f"raised {exc!r}"
+    if want_valid != got_valid:
+        return f"valid: expected {want_valid}, got {got_valid}"
+    if got_table is None or engine in INEXACT_CHARTS:
+        return None
+    differences = chart_differences(want_table, got_table, len(words))
+    if differences:
+        i, j, want, got = differences[0]
+        return f"{len(differences)} cell(s) differ, first [{i}][{j}]: expected {sorted(want)}, got {sorted(got)}"
+    return None
+
+def minimize(cnf, words, engine, source=None):
+    """Greedily drop words and rules while the engine still disagrees.
+
+    Rules are only dropped when the grammar is its own source.
+    """
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(words)):
+            candidate = words[:i] + words[i+1:]
+            if candidate and check(cnf, candidate, engine, source):
+                words = candidate
+                changed = True
+                break
+        if source is not None:
+            continue
+        for head, bodies in cnf.items():
+            for index in range(len(bodies)):
+                candidate = dict(cnf)
+                candidate[head] = bodies[:index] + bodies[index+1:]
+                if check(candidate, words, engine):
+                    cnf = candidate
+                    changed = True
+                    break
+            if changed:
+                break
+    return cnf, words
+
+def run(iterations=500, seed=0, engines=None, max_length=8):
+    """Fuzz every engine against the oracle; returns minimized counterexamples.
+
+    Recognizers are compared on validity only.
+    """
+    rng = random.Random(seed)
+    engines = [name for name in (engines or [*ENGINES, *RECOGNIZERS, *HARNESS_ENGINES]) if name != ORACLE]
+    failures = []
+    rules_cnf = load_cnf()
+    rules_terminals = sorted({body[0] for bodies in rules_cnf.values() for body in bodies if len(body) == 1})
+    for iteration in range(iterations):
+        # Every fourth case uses the real grammar, the rest random ones
+        source = None
+        if iteration % 4 == 3:
+            cnf, terminals, source = rules_cnf, rules_terminals, RULES_CFG
+        else:
+            cnf, terminals = random_cnf_grammar(
+                rng,
+                nonterminals=rng.randint(1, 8),
+                terminals=rng.randint(1, 5),
+                binary_rules=rng.randint(0, 20),
+                lexical_rules=rng.randint(1, 10),
+            )
+        # Occasionally include a word the grammar does not know
+        vocabulary = terminals + ["?"]
+        words = [rng.choice(vocabulary) for _ in range(rng.randint(1, max_length))]
+        for engine in engines:
+            if check(cnf, words, engine, source):
+                small_cnf, small_words = minimize(cnf, words, engine, source)
+                failures.append((engine, small_cnf, small_words, check(small_cnf, small_words, engine, source)))
+        engines = [name for name in engines if name not in {f[0] for f in failures}]
+        if not engines:
+            break
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Differential test of all parsing engines against the reference CYK.")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-length", type=int, default=8)
+    parser.add_argument("--engines", nargs="+", choices=sorted([*ENGINES, *RECOGNIZERS, *HARNESS_ENGINES]))
+    args = parser.parse_args(argv)
+
+    failures = run(args.iterations, args.seed, args.engines, args.max_length)
+    for engine, cnf, words, problem in failures:
+        print(f"MISMATCH {engine}: {problem}")
+        print(f"  words: {' '.join(words)}")
+        for head, bodies in cnf.items():
+            if bodies:
+                print(f"  {head} -> {' | '.join(' '.join(body) for body in bodies)}")
+    if failures:
+        sys.exit(1)
+    print(f"all engines agree with {ORACLE} on {args.iterations} random cases")
+
+if __name__ == "__main__":
+    main()
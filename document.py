@@ -0,0 +1,165 @@
+import argparse
+import json
+import re
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from itertools import tee
+
+from batch import BATCH_ENGINE, check_mapped, validate_stream
+from engines import ENGINES
+from lexicon import DASH_CHARACTERS
+
+# Sentence-final punctuation, possibly repeated ("?!", "..."), with the
+# closing quotes and brackets right after it, which end the same sentence
+TERMINATORS = re.compile(r"([.!?…]+[\"'”’»›)\]}]*)")
+# Words are letters/digits, with inner hyphens kept for reduplications like "galak-galak";
+# the lexicon normalizes the same dashes to "-"
+WORD = re.compile(rf"[^\W_]+(?:[-{DASH_CHARACTERS}][^\W_]+)*")
+
+def segment(lines):
+    """Yield ``(paragraph, text)`` for every sentence of a stream of lines.
+
+    Sentences end at ``.``, ``!``, ``?`` or ``…`` together with any closing
+    quotes or brackets right after it, and at blank lines, and may run
+    across line breaks. Only the current sentence is held in memory.
+    """
+    paragraph = 0
+    in_paragraph = False
+    buffer = []
+    for line in lines:
+        if not line.strip():
+            if buffer:
+                yield paragraph, " ".join(buffer)
+                buffer = []
+            # Runs of blank lines close one paragraph
+            if in_paragraph:
+                paragraph += 1
+                in_paragraph = False
+            continue
+        in_paragraph = True
+        pieces = TERMINATORS.split(line)
+        # pieces alternate text, terminator, text, ...
+        for i, piece in enumerate(pieces):
+            if i % 2 == 1:
+                if buffer:
+                    yield paragraph, " ".join(buffer) + piece
+                    buffer = []
+            elif piece.strip():
+                buffer.append(piece.strip())
+    if buffer:
+        yield paragraph, " ".join(buffer)
+
+def clean(text):
+    """The words of a sentence, without the punctuation the grammar has no rules for."""
+    return WORD.findall(text)
+
+def split_document(lines):
+    """Yield ``(index, paragraph, text, words)`` for every sentence that has words."""
+    index = 0
+    for paragraph, text in segment(lines):
+        words = clean(text)
+        if words:
+            yield index, paragraph, text, words
+            index += 1
+
+@dataclass
+class DocumentStats:
+    """Running totals over the sentences of a document."""
+
+    sentences: int = 0
+    valid: int = 0
+    paragraphs: int = 0
+    tokens: int = 0
+    longest: int = 0
+    parse_ms: float = 0.0
+    unknown: Counter = field(default_factory=Counter)
+
+    def add(self, result):
+        self.sentences += 1
+        self.valid += result["valid"]
+        self.paragraphs = max(self.paragraphs, result["paragraph"] + 1)
+        self.tokens += result["tokens"]
+        self.longest = max(self.longest, result["tokens"])
+        self.parse_ms += result["time_ms"]
+        self.unknown.update(result.get("unknown", {}).keys())
+
+    def as_dict(self, top_unknown=20):
+        """Plain dict for JSON, with the most frequent unknown words."""
+        return {
+            "sentences": self.sentences,
+            "valid": self.valid,
+            "invalid": self.sentences - self.valid,
+            "valid_ratio": round(self.valid / self.sentences, 4) if self.sentences else None,
+            "paragraphs": self.paragraphs,
+            "tokens": self.tokens,
+            "mean_length": round(self.tokens / self.sentences, 2) if self.sentences else None,
+            "longest": self.longest,
+            "parse_ms": round(self.parse_ms, 3),
+            "unknown_words": dict(self.unknown.most_common(top_unknown)),
+        }
+
+def validate_document(lines, workers=None, engine=BATCH_ENGINE, window=1024, chunksize=32, mapped=False,
+                      stats=None):
+    """Yield one result per sentence of a document, in document order.
+
+    Sentences are parsed by the batch worker pool, which loads the compiled
+    grammar once per worker, and at most ``window`` of them are in flight.
+    Each result is the batch result plus ``index``, ``paragraph`` and the
+    original ``text``. Pass a ``DocumentStats`` as ``stats`` to collect
+    totals along the way.
+    """
+    # One copy feeds the pool, the other pairs results with their metadata;
+    # tee only buffers the sentences between the two, i.e. one window
+    for_pool, for_results = tee(split_document(lines))
+    sentences = (" ".join(words) for _, _, _, words in for_pool)
+    results = validate_stream(sentences, workers, engine, ordered=True, window=window, chunksize=chunksize,
+                              mapped=mapped)
+    for (index, paragraph, text, _), result in zip(for_results, results):
+        result = {"index": index, "paragraph": paragraph, "text": text, **result}
+        if stats is not None:
+            stats.add(result)
+        yield result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split Balinese text into sentences and validate each of them.")
+    parser.add_argument("input", nargs="?", default="-", help="text file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file, or - for stdout")
+    parser.add_argument("--stats", help="write aggregate statistics as JSON to this file (- for stderr)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--engine", default=BATCH_ENGINE, choices=sorted(ENGINES))
+    parser.add_argument("--recognize", action="store_true", help="only decide validity, without building charts")
+    parser.add_argument("--window", type=int, default=1024, help="sentences in flight at once")
+    parser.add_argument("--chunksize", type=int, default=32, help="sentences per worker task")
+    parser.add_argument("--mmap", action="store_true", help="memory-map the binary grammar in every worker")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    engine = None if args.recognize else args.engine
+    if args.mmap:
+        try:
+            check_mapped(engine)
+        except ValueError as exc:
+            parser.error(str(exc))
+    stats = DocumentStats()
+    started = time.perf_counter()
+    try:
+        for result in validate_document(source, args.workers, engine, args.window, args.chunksize, args.mmap, stats):
+            sink.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    summary = dict(stats.as_dict(), wall_ms=round((time.perf_counter() - started) * 1000, 3))
+    if args.stats == "-":
+        print(json.dumps(summary, ensure_ascii=False, indent=2), file=sys.stderr)
+    elif args.stats:
+        with open(args.stats, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+from cnf import find_nullable
+
+class EarleyGrammar:
+    """A CFG indexed for Earley parsing, without any CNF conversion."""
+
+    def __init__(self, cfg, start='K'):
+        self.cfg = cfg
+        self.start = start
+        self.rules = []
+        self.rules_of = {}
+        # Lexical bodies are matched in one lookup: word -> categories
+        self.lexical = {}
+        for head, bodies in cfg.items():
+            for body in bodies:
+                if len(body) == 1 and body[0] not in cfg:
+                    self.lexical.setdefault(body[0], set()).add(head)
+                else:
+                    self.rules_of.setdefault(head, []).append(len(self.rules))
+                    self.rules.append((head, tuple(body)))
+        self.nullable = find_nullable(cfg)
+
+def earley_grammar(compiled):
+    """Return the Earley form of a compiled grammar's source CFG, building it once."""
+    grammar = compiled.derived.get("earley")
+    if grammar is None:
+        if compiled.source is None:
+            raise ValueError("the Earley engine needs the source CFG of the compiled grammar")
+        grammar = compiled.derived["earley"] = EarleyGrammar(compiled.source, compiled.start)
+    return grammar
+
+def earley_parse(grammar, words):
+    """Earley parse that also collects every completed (category, span).
+
+    Returns ``(is_valid, table)`` where ``table[i][j]`` holds the categories
+    of the original grammar recognized over words[i..j]. Only categories
+    predicted top-down from the start symbol appear.
+    """
+    n = len(words)
+    table = [[set() for j in range(n)] for i in range(n)]
+    if n == 0:
+        return False, table
+
+    cfg = grammar.cfg
+    rules = grammar.rules
+    rules_of = grammar.rules_of
+    nullable = grammar.nullable
+    # items[p]: (rule, dot, origin) ending at position p
+    items = [set() for _ in range(n + 1)]
+    # waiting[p][symbol]: items at p whose next symbol is ``symbol``
+    waiting = [{} for _ in range(n + 1)]
+
+    def add(p, item, agenda):
+        if item not in items[p]:
+            items[p].add(item)
+            agenda.append(item)
+
+    agenda = []
+    for rule in rules_of.get(grammar.start, ()):
+        add(0, (rule, 0, 0), agenda)
+    # A lexical start symbol can match a one-word sentence directly
+    waiting[0][grammar.start] = []
+
+    for p in range(n + 1):
+        predicted = set()
+        while agenda:
+            rule, dot, origin = agenda.pop()
+            head, body = rules[rule]
+            if dot == len(body):
+                # Empty completions are covered by advancing over nullables
+                if origin < p:
+                    table[origin][p-1].add(head)
+                    for waiting_rule, waiting_dot, waiting_origin in waiting[origin].get(head, ()):
+                        add(p, (waiting_rule, waiting_dot + 1, waiting_origin), agenda)
+                continue
+            symbol = body[dot]
+            waiting[p].setdefault(symbol, []).append((rule, dot, origin))
+            if symbol not in cfg:
+                continue
+            if symbol in nullable:
+                add(p, (rule, dot + 1, origin), agenda)
+            if symbol not in predicted:
+                predicted.add(symbol)
+                for predicted_rule in rules_of.get(symbol, ()):
+                    add(p, (predicted_rule, 0, p), agenda)
+
+        if p == n:
+            break
+        # Scan: predicted lexical categories and literal terminals consume words[p]
+        word = words[p]
+        matched = [symbol for symbol in grammar.lexical.get(word, ()) if symbol in waiting[p]]
+        table[p][p].update(matched)
+        if word not in cfg:
+            matched.append(word)
+        for symbol in matched:
+            for rule, dot, origin in waiting[p].get(symbol, ()):
+                add(p + 1, (rule, dot + 1, origin), agenda)
+
+    return grammar.start in table[0][n-1], table
+
+def earley_tree(grammar, words, table, symbol=None):
+    """One derivation of ``symbol`` over the whole sentence, using the chart.
+
+    Trees use the ``extract_tree`` format, except that rule nodes may have
+    any number of children, so unit chains such as NP -> Noun are kept, and
+    a nullable symbol may derive the empty span ``(symbol, i, i - 1, ())``.
+    Returns None when there is no derivation.
+    """
+    symbol = symbol or grammar.start
+    n = len(words)
+    cfg = grammar.cfg
+    nullable = grammar.nullable
+    failed = set()
+
+    def covers(child, i, j):
+        if j < i:
+            return child in nullable
+        if child in cfg:
+            return child in table[i][j]
+        return i == j and words[i] == child
+
+    def empty(head, i, path):
+        # A derivation of the empty string; ``path`` breaks unit cycles
+        if head in path:
+            return None
+        path = path | {head}
+        for rule in grammar.rules_of.get(head, ()):
+            body = grammar.rules[rule][1]
+            if all(child in nullable for child in body):
+                children = [empty(child, i, path) for child in body]
+                if None not in children:
+                    return (head, i, i - 1, tuple(children))
+        return None
+
+    def build(head, i, j, path):
+        if j < i:
+            return empty(head, i, frozenset())
+        if (head, i, j) in failed or (head, i, j) in path:
+            return None
+        path = path | {(head, i, j)}
+        if i == j and head in grammar.lexical.get(words[i], ()):
+            return (head, i, j, words[i])
+        for rule in grammar.rules_of.get(head, ()):
+            children = split(grammar.rules[rule][1], i, j, path)
+            if children is not None:
+                return (head, i, j, tuple(children))
+        failed.add((head, i, j))
+        return None
+
+    def split(body, i, j, path):
+        # Assign consecutive sub-spans to the body's symbols; only nullable
+        # symbols may take an empty one
+        if not body:
+            return [] if i > j else None
+        first, rest = body[0], body[1:]
+        last_end = j - sum(symbol not in nullable for symbol in rest)
+        for end in range(i - 1 if first in nullable else i, last_end + 1):
+            if not covers(first, i, end):
+                continue
+            remainder = split(rest, end + 1, j, path)
+            if remainder is None:
+                continue
+            child = build(first, i, end, path) if first in cfg else (first, i, end, words[i])
+            if child is not None:
+                return [child] + remainder
+        return None
+
+    if n == 0 or symbol not in table[0][n-1]:
+        return None
+    return build(symbol, 0, n - 1, frozenset())
@@ -0,0 +1,97 @@
+from chart import cyk_compact
+from cyk import cyk_algorithm, cyk_indexed
+from cyk_bitset import bitset_grammar, cyk_bitset, cyk_numpy, decode_array, decode_table, HAS_NUMPY
+from earley import earley_grammar, earley_parse
+from incremental import IncrementalParser
+from parallel import parallel_filler
+from profiling import phase
+from recognizer import recognize
+from weighted import viterbi_cyk, weighted_grammar
+
+# name -> function(compiled, words) returning (is_valid, table of sets)
+ENGINES = {}
+DEFAULT_ENGINE = "indexed"
+# name -> function(compiled, words) returning only is_valid
+RECOGNIZERS = {}
+# Engines whose charts are not the CNF chart (e.g. they hold source categories)
+INEXACT_CHARTS = set()
+
+def register_engine(name, engine, exact_chart=True):
+    """Make a parsing engine selectable by name.
+
+    Pass ``exact_chart=False`` when the engine's cells are not the CNF
+    cells of cyk_algorithm, so comparisons only look at validity.
+    """
+    ENGINES[name] = engine
+    if not exact_chart:
+        INEXACT_CHARTS.add(name)
+    return engine
+
+def register_recognizer(name, recognizer):
+    """Make a validity-only recognizer selectable by name."""
+    RECOGNIZERS[name] = recognizer
+    return recognizer
+
+def get_engine(name=DEFAULT_ENGINE):
+    """Look up a registered engine."""
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown engine {name!r}; choose from {', '.join(sorted(ENGINES))}") from None
+
+def run_engine(compiled, words, name=DEFAULT_ENGINE, profile=None):
+    """Parse with the named engine, recording into ``profile`` if given."""
+    engine = get_engine(name)
+    if profile is None:
+        return engine(compiled, words)
+    if engine is cyk_indexed:
+        return cyk_indexed(compiled, words, profile=profile)
+    # Other engines are only timed as a whole; their counters stay unreported
+    with phase(profile, "parse"):
+        result = engine(compiled, words)
+    profile.tokens += len(words)
+    return result
+
+def _reference(compiled, words):
+    return cyk_algorithm(compiled.cnf, words)
+
+def _bitset(compiled, words):
+    bits = bitset_grammar(compiled)
+    is_valid, table = cyk_bitset(bits, words)
+    return is_valid, decode_table(bits, table)
+
+def _compact(compiled, words):
+    return cyk_compact(bitset_grammar(compiled), words)
+
+def _parallel(compiled, words):
+    return parallel_filler(compiled).parse(words)
+
+def _incremental(compiled, words):
+    parser = IncrementalParser(compiled)
+    parser.set_words(words)
+    return parser.is_valid, parser.table()
+
+def _earley(compiled, words):
+    return earley_parse(earley_grammar(compiled), words)
+
+def _viterbi(compiled, words):
+    is_valid, scores, _ = viterbi_cyk(weighted_grammar(compiled), words)
+    return is_valid, [[set(cell) for cell in row] for row in scores]
+
+def _numpy(compiled, words):
+    bits = bitset_grammar(compiled)
+    is_valid, chart = cyk_numpy(bits, words)
+    return is_valid, decode_array(bits, chart)
+
+register_engine("reference", _reference)
+register_engine("indexed", cyk_indexed)
+register_engine("bitset", _bitset)
+register_engine("compact", _compact)
+register_engine("parallel", _parallel)
+register_engine("incremental", _incremental)
+register_engine("earley", _earley, exact_chart=False)
+register_engine("viterbi", _viterbi, exact_chart=False)
+if HAS_NUMPY:
+    register_engine("numpy", _numpy)
+
+register_recognizer("recognizer", recognize)
@@ -0,0 +1,50 @@
+from itertools import islice
+
+def count_table(back):
+    """Number of derivations of every (head, span) in a backpointer chart.
+
+    Filled bottom-up by span length, so nothing is enumerated.
+    """
+    n = len(back)
+    counts = [[{} for j in range(n)] for i in range(n)]
+    for i in range(n):
+        counts[i][i] = dict.fromkeys(back[i][i], 1)
+    for length in range(2, n + 1):
+        for i in range(n - length + 1):
+            j = i + length - 1
+            cell = counts[i][j]
+            for head, derivations in back[i][j].items():
+                cell[head] = sum(counts[i][k][B] * counts[k+1][j][C] for k, B, C in derivations)
+    return counts
+
+def count_derivations(back, symbol='K', i=0, j=None):
+    """Number of distinct parse trees for ``symbol`` over words[i..j]."""
+    n = len(back)
+    if j is None:
+        j = n - 1
+    if n == 0 or j < i:
+        return 0
+    return count_table(back)[i][j].get(symbol, 0)
+
+def _trees(back, words, symbol, i, j):
+    if i == j:
+        yield (symbol, i, j, words[i])
+        return
+    for k, B, C in back[i][j][symbol]:
+        for left in _trees(back, words, B, i, k):
+            for right in _trees(back, words, C, k+1, j):
+                yield (symbol, i, j, (left, right))
+
+def iter_trees(back, words, symbol='K', limit=None):
+    """Lazily yield parse trees in the ``extract_tree`` format, up to ``limit``.
+
+    Only the current path through the forest is held in memory.
+    """
+    n = len(words)
+    if n == 0 or symbol not in back[0][n-1]:
+        return iter(())
+    return islice(_trees(back, words, symbol, 0, n - 1), limit)
+
+def nth_tree(back, words, index, symbol='K'):
+    """The ``index``-th parse tree (0-based), or None if there are fewer."""
+    return next(iter(islice(iter_trees(back, words, symbol), index, None)), None)
@@ -0,0 +1,207 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from chart import TriangularChart
+from cyk_bitset import bitset_grammar
+
+MAGIC = b"BCNF"
+VERSION = 1
+# Sections in file order: uint32 arrays, or UTF-8 blobs padded to 4 bytes
+SECTIONS = (
+    "symbol_offsets", "symbol_blob",      # nonterminal names
+    "terminal_offsets", "terminal_blob",  # terminals, sorted by UTF-8 bytes
+    "lexical_offsets", "lexical_heads",   # CSR: terminal -> head IDs
+    "binary_offsets", "binary_right", "binary_head",  # CSR: left ID -> (right ID, head ID)
+)
+_HEADER = struct.Struct(f"<4sIII{2 * len(SECTIONS)}I")
+NO_START = 0xFFFFFFFF
+
+def _string_table(strings):
+    offsets = array("I", [0])
+    blob = bytearray()
+    for string in strings:
+        blob += string
+        offsets.append(len(blob))
+    # Pad the blob so the next section stays 4-byte aligned
+    blob += b"\0" * (-len(blob) % 4)
+    return offsets, bytes(blob)
+
+def _check_platform():
+    # Sections are read back with memoryview.cast("I"), i.e. native uint32
+    if sys.byteorder != "little" or array("I").itemsize != 4:
+        raise RuntimeError("binary grammars need 4-byte little-endian unsigned ints")
+
+def write_binary_grammar(compiled, path):
+    """Write a compiled grammar as a symbol table plus packed rule arrays."""
+    _check_platform()
+    bits = bitset_grammar(compiled)
+    ids = bits.ids
+    symbol_offsets, symbol_blob = _string_table(s.encode("utf-8") for s in bits.symbols)
+    terminals = sorted(word.encode("utf-8") for word in compiled.lexical)
+    terminal_offsets, terminal_blob = _string_table(terminals)
+
+    lexical_offsets, lexical_heads = array("I", [0]), array("I")
+    for word in terminals:
+        lexical_heads.extend(sorted(ids[h] for h in compiled.lexical[word.decode("utf-8")]))
+        lexical_offsets.append(len(lexical_heads))
+
+    triples = sorted((ids[B], ids[C], ids[A]) for (B, C), heads in compiled.binary.items() for A in heads)
+    binary_offsets, binary_right, binary_head = array("I", [0] * (len(bits.symbols) + 1)), array("I"), array("I")
+    for B, C, A in triples:
+        binary_offsets[B + 1] += 1
+        binary_right.append(C)
+        binary_head.append(A)
+    for B in range(len(bits.symbols)):
+        binary_offsets[B + 1] += binary_offsets[B]
+
+    sections = {
+        "symbol_offsets": symbol_offsets.tobytes(), "symbol_blob": symbol_blob,
+        "terminal_offsets": terminal_offsets.tobytes(), "terminal_blob": terminal_blob,
+        "lexical_offsets": lexical_offsets.tobytes(), "lexical_heads": lexical_heads.tobytes(),
+        "binary_offsets": binary_offsets.tobytes(), "binary_right": binary_right.tobytes(),
+        "binary_head": binary_head.tobytes(),
+    }
+    layout = []
+    position = _HEADER.size
+    for name in SECTIONS:
+        layout += [position, len(sections[name])]
+        position += len(sections[name])
+    start = ids.get(compiled.start, NO_START)
+    header = _HEADER.pack(MAGIC, VERSION, len(bits.symbols), start, *layout)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for name in SECTIONS:
+            f.write(sections[name])
+    os.replace(tmp_path, path)
+
+class MappedGrammar:
+    """Read-only, memory-mapped view of a binary grammar.
+
+    Nothing is copied at load time: rule arrays are ``memoryview`` casts over
+    the mapping, so processes that map the same file share its pages.
+    """
+
+    def __init__(self, path):
+        _check_platform()
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, version, n_symbols, start, *layout = _HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} binary grammar")
+        self.path = path
+        self.n_symbols = n_symbols
+        self.start_bit = 0 if start == NO_START else 1 << start
+        for name, (offset, length) in zip(SECTIONS, zip(layout[::2], layout[1::2])):
+            section = view[offset:offset + length]
+            setattr(self, name, section if name.endswith("blob") else section.cast("I"))
+        self.symbols = _SymbolTable(self)
+        self._decoded = {0: frozenset()}
+
+    def _string(self, offsets, blob, i):
+        return bytes(blob[offsets[i]:offsets[i + 1]])
+
+    def terminal_id(self, word):
+        """Binary search of the sorted terminal table; None if unknown."""
+        key = word.encode("utf-8")
+        low, high = 0, len(self.terminal_offsets) - 1
+        while low < high:
+            mid = (low + high) // 2
+            probe = self._string(self.terminal_offsets, self.terminal_blob, mid)
+            if probe < key:
+                low = mid + 1
+            elif probe > key:
+                high = mid
+            else:
+                return mid
+        return None
+
+    @property
+    def terminal_count(self):
+        return len(self.terminal_offsets) - 1
+
+    def terminals(self):
+        """Every terminal, decoded from the mapped table."""
+        return [self._string(self.terminal_offsets, self.terminal_blob, i).decode("utf-8")
+                for i in range(self.terminal_count)]
+
+    def lexical_mask(self, word):
+        """Bitmask of the heads that produce ``word``."""
+        t = self.terminal_id(word)
+        if t is None:
+            return 0
+        mask = 0
+        for e in range(self.lexical_offsets[t], self.lexical_offsets[t + 1]):
+            mask |= 1 << self.lexical_heads[e]
+        return mask
+
+    def combine(self, lefts, rights):
+        """Heads of every B C rule over paired left/right masks."""
+        offsets, right_ids, head_ids = self.binary_offsets, self.binary_right, self.binary_head
+        result = 0
+        for left, right in zip(lefts, rights):
+            if not right:
+                continue
+            while left:
+                low = left & -left
+                left ^= low
+                B = low.bit_length() - 1
+                for e in range(offsets[B], offsets[B + 1]):
+                    if right >> right_ids[e] & 1:
+                        result |= 1 << head_ids[e]
+        return result
+
+    def decode(self, mask):
+        """Turn a bitmask back into a set of nonterminal names."""
+        cell = self._decoded.get(mask)
+        if cell is None:
+            cell = frozenset(self.symbols[i] for i in range(mask.bit_length()) if mask >> i & 1)
+            self._decoded[mask] = cell
+        return cell
+
+    def close(self):
+        for name in SECTIONS:
+            getattr(self, name).release()
+        self._mmap.close()
+
+class _SymbolTable:
+    """Lazily decoded nonterminal names of a MappedGrammar."""
+
+    def __init__(self, grammar):
+        self.grammar = grammar
+        self.cache = {}
+
+    def __len__(self):
+        return self.grammar.n_symbols
+
+    def __getitem__(self, i):
+        name = self.cache.get(i)
+        if name is None:
+            g = self.grammar
+            name = self.cache[i] = g._string(g.symbol_offsets, g.symbol_blob, i).decode("utf-8")
+        return name
+
+def cyk_mapped(grammar, words):
+    """Bitset CYK straight off a MappedGrammar, into a TriangularChart."""
+    n = len(words)
+    chart = TriangularChart(n, grammar)
+    if n == 0:
+        return False, chart
+
+    cells = chart.cells
+    index = chart.index
+    for i in range(n):
+        cells[index(i, i)] = grammar.lexical_mask(words[i])
+
+    for length in range(2, n + 1):
+        for i in range(n - length + 1):
+            j = i + length - 1
+            row = index(i, i)
+            rights = [cells[index(k + 1, j)] for k in range(i, j)]
+            cells[row + length - 1] = grammar.combine(cells[row:row + length - 1], rights)
+    return bool(cells[index(0, n - 1)] & grammar.start_bit), chart
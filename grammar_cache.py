@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+
+from cfg_grammar import RULES_CFG
+from cnf import convert_to_cnf, remove_epsilon_productions, remove_unit_productions
+from cyk import compile_grammar
+from grammar_binary import MappedGrammar, write_binary_grammar
+from optimize import optimize_grammar
+
+# Bump when the CNF pipeline changes so old artifacts are ignored
+PIPELINE_VERSION = 1
+CACHE_DIR = os.environ.get(
+    "BALI_GRAMMAR_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".grammar_cache"),
+)
+
+_cnf_cache = {}
+_compiled_cache = {}
+_mapped_cache = {}
+
+def grammar_hash(cfg):
+    """Content hash of a CFG and the pipeline version."""
+    payload = json.dumps([PIPELINE_VERSION, cfg], sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def artifact_path(key, cache_dir=CACHE_DIR):
+    """Path of the on-disk CNF artifact for a grammar hash."""
+    return os.path.join(cache_dir, f"cnf-{key}.json")
+
+def binary_artifact_path(key, cache_dir=CACHE_DIR):
+    """Path of the memory-mappable binary grammar for a grammar hash."""
+    return os.path.join(cache_dir, f"cnf-{key}.bin")
+
+def _read_artifact(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_artifact(path, cnf):
+    # Write to a temp file first so concurrent workers never read a partial file
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cnf, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+def load_cnf(cfg=None, cache_dir=CACHE_DIR):
+    """Return the CNF of a grammar, converting it at most once per content hash."""
+    cfg = RULES_CFG if cfg is None else cfg
+    key = grammar_hash(cfg)
+    cnf = _cnf_cache.get(key)
+    if cnf is not None:
+        return cnf
+
+    path = artifact_path(key, cache_dir) if cache_dir else None
+    cnf = _read_artifact(path) if path else None
+    if cnf is None:
+        cnf = convert_to_cnf(remove_unit_productions(remove_epsilon_productions(cfg)))
+        if path:
+            _write_artifact(path, cnf)
+    _cnf_cache[key] = cnf
+    return cnf
+
+def load_compiled(cfg=None, start="K", cache_dir=CACHE_DIR, optimize=False):
+    """Return the compiled CNF grammar, memoized by content hash.
+
+    With ``optimize=True`` the grammar is shrunk by ``optimize_grammar``
+    first, ``compiled.members`` maps merged heads back to their names and
+    ``compiled.optimize_report`` holds the size before and after.
+    """
+    cfg = RULES_CFG if cfg is None else cfg
+    key = grammar_hash(cfg)
+    compiled = _compiled_cache.get((key, start, optimize))
+    if compiled is None:
+        cnf = load_cnf(cfg, cache_dir)
+        members = report = None
+        if optimize:
+            cnf, members, report = optimize_grammar(cnf, start)
+        compiled = compile_grammar(cnf, start, source=cfg)
+        compiled.fingerprint = key
+        compiled.members = members
+        compiled.optimize_report = report
+        _compiled_cache[(key, start, optimize)] = compiled
+    return compiled
+
+def binary_artifact(cfg=None, cache_dir=CACHE_DIR):
+    """Path of the binary grammar for ``cfg``, writing it first if missing."""
+    cfg = RULES_CFG if cfg is None else cfg
+    key = grammar_hash(cfg)
+    path = binary_artifact_path(key, cache_dir)
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        write_binary_grammar(load_compiled(cfg, cache_dir=cache_dir), path)
+    return path
+
+def load_mapped(cfg=None, cache_dir=CACHE_DIR):
+    """Memory-map the binary grammar of ``cfg``, once per process."""
+    path = binary_artifact(cfg, cache_dir)
+    mapped = _mapped_cache.get(path)
+    if mapped is None:
+        mapped = _mapped_cache[path] = MappedGrammar(path)
+    return mapped
+
+def clear_memory_cache():
+    """Forget in-process results; on-disk artifacts are kept."""
+    _cnf_cache.clear()
+    _compiled_cache.clear()
+    _mapped_cache.clear()
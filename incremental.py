@@ -0,0 +1,63 @@
+from cyk import combine_cells
+
+class IncrementalParser:
+    """Left-to-right CYK that keeps the chart of the current prefix.
+
+    Appending a word only fills the new column ``[i][n]``; replacing the last
+    word drops and refills that one column.
+    """
+
+    def __init__(self, compiled):
+        self.compiled = compiled
+        self.words = []
+        # columns[j][i] is the cell for span [i][j]
+        self.columns = []
+
+    def append(self, word):
+        """Add a word and compute the cells of spans ending at it."""
+        j = len(self.words)
+        self.words.append(word)
+        column = [None] * (j + 1)
+        column[j] = set(self.compiled.lexical.get(word, ()))
+        by_left = self.compiled.by_left
+        columns = self.columns
+        for i in range(j - 1, -1, -1):
+            cell = set()
+            for k in range(i, j):
+                combine_cells(cell, columns[k][i], column[k+1], by_left)
+            column[i] = cell
+        columns.append(column)
+
+    def pop(self):
+        """Remove the last word and its column."""
+        self.columns.pop()
+        return self.words.pop()
+
+    def set_words(self, words):
+        """Move to a new word list, reusing the columns of the shared prefix."""
+        common = 0
+        for old, new in zip(self.words, words):
+            if old != new:
+                break
+            common += 1
+        while len(self.words) > common:
+            self.pop()
+        for word in words[common:]:
+            self.append(word)
+
+    def update(self, sentence):
+        """Tokenize and parse a (possibly partial) sentence incrementally."""
+        self.set_words(sentence.strip().split())
+
+    def cell(self, i, j):
+        """Categories spanning words[i..j]."""
+        return self.columns[j][i]
+
+    @property
+    def is_valid(self):
+        return bool(self.words) and self.compiled.start in self.columns[-1][0]
+
+    def table(self):
+        """The chart in ``parse_table[i][j]`` form, as returned by cyk_indexed."""
+        n = len(self.words)
+        return [[self.columns[j][i] if j >= i else set() for j in range(n)] for i in range(n)]
@@ -0,0 +1,175 @@
+import re
+
+# Dash characters typed or pasted in place of the ASCII hyphen
+DASH_CHARACTERS = "‐‑‒–—−"
+DASHES = str.maketrans(dict.fromkeys(DASH_CHARACTERS, "-"))
+# "galak2" is the informal spelling of the reduplication "galak-galak"
+REDUPLICATION = re.compile(r"([^\W\d_]+)2")
+
+def normalize_token(token):
+    """Lookup key of a token: case-folded, ASCII hyphens, reduplication spelled out."""
+    key = token.strip().casefold().translate(DASHES)
+    key = re.sub(r"-{2,}", "-", key).strip("-")
+    match = REDUPLICATION.fullmatch(key)
+    if match:
+        key = f"{match.group(1)}-{match.group(1)}"
+    return key
+
+def deletes(word, max_distance):
+    """``word`` and every string made by deleting up to ``max_distance`` characters."""
+    found = {word}
+    frontier = [word]
+    for _ in range(max_distance):
+        next_frontier = []
+        for variant in frontier:
+            for i in range(len(variant)):
+                shorter = variant[:i] + variant[i+1:]
+                if shorter not in found:
+                    found.add(shorter)
+                    next_frontier.append(shorter)
+        frontier = next_frontier
+    return found
+
+def edit_distance(a, b, max_distance):
+    """Optimal string alignment distance, or ``max_distance + 1`` if it is larger."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i-1] != b[j-1]
+            current[j] = min(previous[j] + 1, current[j-1] + 1, previous[j-1] + cost)
+            if i > 1 and j > 1 and a[i-1] == b[j-2] and a[i-2] == b[j-1]:
+                current[j] = min(current[j], previous2[j-2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+def allowed_distance(key, max_distance):
+    """Edits a suggestion may be from ``key``; short tokens have few letters to spare.
+
+    Tokens of up to 2 characters get no suggestions, up to 4 characters
+    one edit, longer ones ``max_distance``.
+    """
+    if len(key) <= 2:
+        return 0
+    if len(key) <= 4:
+        return min(1, max_distance)
+    return max_distance
+
+class Lexicon:
+    """Terminal vocabulary with O(1) membership and SymSpell-style suggestions.
+
+    Every word is stored under its ``normalize_token`` key. The deletion
+    neighbourhood of each key's first ``prefix_length`` characters is
+    indexed on the first ``suggest``, so a suggestion lookup only generates
+    the deletions of the typed token and verifies the few words that share
+    one, and processes that never suggest never pay for the index.
+    """
+
+    def __init__(self, words, max_distance=2, prefix_length=7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        # key -> word as written in the grammar
+        self.canonical = {}
+        for word in sorted(words):
+            self.canonical.setdefault(normalize_token(word), word)
+        # deletion variant -> keys it was derived from, built by the first suggest()
+        self.index = None
+
+    def __len__(self):
+        return len(self.canonical)
+
+    def __contains__(self, token):
+        return normalize_token(token) in self.canonical
+
+    def lookup(self, token):
+        """The grammar's spelling of ``token``, or None if it is not in the lexicon."""
+        return self.canonical.get(normalize_token(token))
+
+    def normalize(self, words):
+        """Known words in the grammar's spelling; unknown ones are left as typed."""
+        return [self.canonical.get(normalize_token(word), word) for word in words]
+
+    def unknown(self, words):
+        """Tokens of ``words`` that are not in the lexicon, in order."""
+        return [word for word in words if normalize_token(word) not in self.canonical]
+
+    def suggest(self, token, limit=3):
+        """Up to ``limit`` lexicon words closest to ``token``, nearest first."""
+        key = normalize_token(token)
+        if key in self.canonical:
+            return [self.canonical[key]]
+        max_distance = allowed_distance(key, self.max_distance)
+        if max_distance == 0:
+            return []
+        index = self.index
+        if index is None:
+            index = {}
+            for known in self.canonical:
+                for variant in deletes(known[:self.prefix_length], self.max_distance):
+                    index.setdefault(variant, []).append(known)
+            # Assigned once complete, so concurrent readers never see half an index
+            self.index = index
+        # The index holds deletions up to self.max_distance, enough for any smaller distance
+        candidates = set()
+        for variant in deletes(key[:self.prefix_length], max_distance):
+            candidates.update(index.get(variant, ()))
+        scored = []
+        for candidate in candidates:
+            distance = edit_distance(key, candidate, max_distance)
+            if distance <= max_distance:
+                scored.append((distance, candidate))
+        scored.sort()
+        return [self.canonical[candidate] for _, candidate in scored[:limit]]
+
+class MappedLexicon:
+    """The ``Lexicon`` interface over the terminal table of a ``MappedGrammar``.
+
+    Words spelled as in the grammar are found by binary search in the
+    shared mapping. A ``Lexicon`` of the terminals is only built for the
+    first word that needs normalizing or a suggestion.
+    """
+
+    def __init__(self, grammar):
+        self.grammar = grammar
+        self.full = None
+
+    def _full(self):
+        if self.full is None:
+            self.full = Lexicon(self.grammar.terminals())
+        return self.full
+
+    def __len__(self):
+        return self.grammar.terminal_count
+
+    def __contains__(self, token):
+        return self.lookup(token) is not None
+
+    def lookup(self, token):
+        """The grammar's spelling of ``token``, or None if it is not in the lexicon."""
+        if self.grammar.terminal_id(token) is not None:
+            return token
+        return self._full().lookup(token)
+
+    def normalize(self, words):
+        """Known words in the grammar's spelling; unknown ones are left as typed."""
+        return [self.lookup(word) or word for word in words]
+
+    def unknown(self, words):
+        """Tokens of ``words`` that are not in the lexicon, in order."""
+        return [word for word in words if self.lookup(word) is None]
+
+    def suggest(self, token, limit=3):
+        """Up to ``limit`` lexicon words closest to ``token``, nearest first."""
+        return self._full().suggest(token, limit)
+
+def lexicon(compiled):
+    """Return the lexicon of a compiled grammar, building it once."""
+    words = compiled.derived.get("lexicon")
+    if words is None:
+        words = compiled.derived["lexicon"] = Lexicon(compiled.lexical)
+    return words
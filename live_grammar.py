@@ -0,0 +1,244 @@
+from cyk import CompiledGrammar
+from grammar_cache import grammar_hash
+
+class LiveCompiledGrammar(CompiledGrammar):
+    """A compiled grammar whose fingerprint is hashed on first use after an edit."""
+
+    def __init__(self, source, start='K'):
+        self._fingerprint = None
+        super().__init__({}, start, source=source)
+
+    @property
+    def fingerprint(self):
+        if self._fingerprint is None:
+            self._fingerprint = grammar_hash(self.source)
+        return self._fingerprint
+
+    @fingerprint.setter
+    def fingerprint(self, value):
+        # None marks the hash stale
+        self._fingerprint = value
+
+class LiveGrammar:
+    """A compiled grammar that accepts lexicon and rule edits in place.
+
+    Every symbol has "own" CNF productions: the words of its lexical bodies
+    and the first pair of each longer body after the usual ``T<word>`` and
+    ``X<n>`` helpers. A head's rows in the lookup indexes are the union of
+    the own productions of everything it reaches by unit productions, kept
+    as reference counts, so an edit only moves the productions it adds or
+    removes, and only for the heads that reach the edited one. The source
+    grammar must be epsilon-free, like ``RULES_CFG``.
+    """
+
+    def __init__(self, cfg, start='K'):
+        self.cfg = {head: [] for head in cfg}
+        self.compiled = LiveCompiledGrammar(self.cfg, start)
+        self.own_words = {}   # symbol -> {word: count}
+        self.own_pairs = {}   # symbol -> {(B, C): count}
+        self.unit_edges = {}  # symbol -> {target: count}
+        self.reach = {}       # symbol -> symbols it reaches by unit productions, itself included
+        self.reached_by = {}  # symbol -> symbols that reach it, itself included
+        self.words_of = {}    # head -> {word: reached symbols that own it}
+        self.pairs_of = {}    # head -> {(B, C): reached symbols that own it}
+        self.rows = {}        # head -> {body: position in compiled.cnf[head]}
+        self.binarized = {}   # tuple(body) -> first pair of its binarization
+        self.counter = 0
+        for head in cfg:
+            self._ensure_symbol(head)
+        for head, bodies in cfg.items():
+            for body in bodies:
+                if not body:
+                    raise ValueError("epsilon productions are not supported in a live grammar")
+                self.cfg[head].append(list(body))
+                self._count(head, list(body), 1)
+
+    def add_word(self, category, word):
+        """Add ``category -> word``."""
+        self.add_rule(category, [word])
+
+    def remove_word(self, category, word):
+        """Remove ``category -> word``."""
+        self.remove_rule(category, [word])
+
+    def add_rule(self, head, body):
+        """Add ``head -> body``, updating only the index rows it affects."""
+        body = list(body)
+        if not body:
+            raise ValueError("epsilon productions are not supported in a live grammar")
+        if head not in self.cfg:
+            # Every owned word is in the lexical index of its own symbol at least
+            if head in self.compiled.lexical:
+                raise ValueError(f"{head!r} is already used as a word")
+            self.cfg[head] = []
+            self._ensure_symbol(head)
+        self.cfg[head].append(body)
+        self._count(head, body, 1)
+        self._edited()
+
+    def remove_rule(self, head, body):
+        """Remove one ``head -> body``; raises KeyError if there is none."""
+        body = list(body)
+        if body not in self.cfg.get(head, []):
+            raise KeyError(f"{head} -> {' '.join(body)} is not in the grammar")
+        self.cfg[head].remove(body)
+        self._count(head, body, -1)
+        self._edited()
+
+    def _ensure_symbol(self, symbol):
+        if symbol not in self.own_words:
+            self.own_words[symbol] = {}
+            self.own_pairs[symbol] = {}
+            self.unit_edges[symbol] = {}
+            self.reach[symbol] = {symbol}
+            self.reached_by[symbol] = {symbol}
+            self.words_of[symbol] = {}
+            self.pairs_of[symbol] = {}
+            self.rows[symbol] = {}
+            self.compiled.cnf[symbol] = []
+
+    def _count(self, head, body, delta):
+        if len(body) == 1 and body[0] in self.cfg:
+            self._count_unit(head, body[0], delta)
+        elif len(body) == 1:
+            self._own(head, body[0], delta)
+        else:
+            self._own(head, self._binarize(body), delta)
+
+    def _own(self, symbol, production, delta):
+        """Count a word or pair ``symbol`` owns; the first and last copy reach the indexes."""
+        table = self.own_pairs[symbol] if isinstance(production, tuple) else self.own_words[symbol]
+        count = table.get(production, 0) + delta
+        if count > 0:
+            table[production] = count
+        else:
+            del table[production]
+        if count == (1 if delta > 0 else 0):
+            for head in self.reached_by[symbol]:
+                self._credit(head, production, delta)
+
+    def _count_unit(self, head, target, delta):
+        edges = self.unit_edges[head]
+        count = edges.get(target, 0) + delta
+        if count > 0:
+            edges[target] = count
+            if count > 1:
+                return
+            # Every head that reaches ``head`` now also reaches what ``target`` reaches
+            for source in list(self.reached_by[head]):
+                for symbol in self.reach[target] - self.reach[source]:
+                    self.reach[source].add(symbol)
+                    self.reached_by[symbol].add(source)
+                    self._credit_symbol(source, symbol, 1)
+            return
+        del edges[target]
+        # Heads that reached ``head`` may have reached some symbols only through this edge
+        for source in list(self.reached_by[head]):
+            reach = self._walk(source)
+            for symbol in self.reach[source] - reach:
+                self.reached_by[symbol].discard(source)
+                self._credit_symbol(source, symbol, -1)
+            self.reach[source] = reach
+
+    def _walk(self, symbol):
+        """Symbols reachable from ``symbol`` by unit productions, itself included."""
+        found = {symbol}
+        stack = [symbol]
+        while stack:
+            for target in self.unit_edges[stack.pop()]:
+                if target not in found:
+                    found.add(target)
+                    stack.append(target)
+        return found
+
+    def _credit_symbol(self, head, symbol, delta):
+        for word in self.own_words[symbol]:
+            self._credit(head, word, delta)
+        for pair in self.own_pairs[symbol]:
+            self._credit(head, pair, delta)
+
+    def _credit(self, head, production, delta):
+        """Count one more or one fewer reached owner of a production of ``head``."""
+        table = self.pairs_of[head] if isinstance(production, tuple) else self.words_of[head]
+        count = table.get(production, 0) + delta
+        if count > 0:
+            table[production] = count
+            if count == 1:
+                self._index(head, production, True)
+        else:
+            del table[production]
+            self._index(head, production, False)
+
+    def _index(self, head, production, add):
+        """Add or remove ``head -> production`` in the lookup indexes and its CNF row."""
+        compiled = self.compiled
+        key = production if isinstance(production, tuple) else (production,)
+        row = compiled.cnf[head]
+        positions = self.rows[head]
+        if add:
+            positions[key] = len(row)
+            row.append(list(key))
+        else:
+            # Move the last body into the freed slot
+            position = positions.pop(key)
+            last = row.pop()
+            if position < len(row):
+                row[position] = last
+                positions[tuple(last)] = position
+
+        if len(key) == 1:
+            if add:
+                compiled.lexical.setdefault(production, set()).add(head)
+            else:
+                compiled.lexical[production].discard(head)
+                if not compiled.lexical[production]:
+                    del compiled.lexical[production]
+            return
+        B, C = key
+        if add:
+            # by_left shares the head sets of binary
+            heads_of = compiled.binary.setdefault(key, set())
+            heads_of.add(head)
+            compiled.by_left.setdefault(B, {})[C] = heads_of
+        else:
+            compiled.binary[key].discard(head)
+            if not compiled.binary[key]:
+                del compiled.binary[key]
+                del compiled.by_left[B][C]
+                if not compiled.by_left[B]:
+                    del compiled.by_left[B]
+
+    def _binarize(self, body):
+        """First (B, C) pair of a long body, creating its helpers once."""
+        key = tuple(body)
+        if key in self.binarized:
+            return self.binarized[key]
+        symbols = []
+        for symbol in body:
+            if symbol not in self.cfg:
+                helper = f"T{symbol}"
+                if helper not in self.own_words:
+                    self._ensure_symbol(helper)
+                    self._own(helper, symbol, 1)
+                symbol = helper
+            symbols.append(symbol)
+        # A -> s0 X, X -> s1 X', ..., X'' -> s[-2] s[-1]
+        pair = (symbols[-2], symbols[-1])
+        for symbol in reversed(symbols[:-2]):
+            helper = f"X{self.counter}"
+            self.counter += 1
+            self._ensure_symbol(helper)
+            self._own(helper, pair, 1)
+            pair = (symbol, helper)
+        self.binarized[key] = pair
+        return pair
+
+    def _edited(self):
+        compiled = self.compiled
+        compiled.fingerprint = None
+        # Engine structures built from the old indexes are stale now; the
+        # parallel filler owns a worker pool that must be shut down first
+        filler = compiled.derived.get("parallel")
+        if filler is not None:
+            filler.close()
+        compiled.derived.clear()
@@ -0,0 +1,101 @@
+def grammar_size(cnf):
+    """Count heads, lexical rules and binary rules of a CNF grammar."""
+    lexical = binary = 0
+    for bodies in cnf.values():
+        for body in bodies:
+            if len(body) == 1:
+                lexical += 1
+            elif len(body) == 2:
+                binary += 1
+    return {"heads": len(cnf), "lexical": lexical, "binary": binary}
+
+def dedupe_bodies(cnf):
+    """Drop repeated bodies of each head, keeping the first occurrence."""
+    return {head: [list(body) for body in dict.fromkeys(map(tuple, bodies))] for head, bodies in cnf.items()}
+
+def generating_symbols(cnf):
+    """Heads that derive at least one terminal string."""
+    generating = set()
+    changed = True
+    while changed:
+        changed = False
+        for head, bodies in cnf.items():
+            if head in generating:
+                continue
+            for body in bodies:
+                if all(symbol in generating or symbol not in cnf for symbol in body):
+                    generating.add(head)
+                    changed = True
+                    break
+    return generating
+
+def reachable_symbols(cnf, start='K'):
+    """Heads reachable from the start symbol."""
+    reachable = {start} if start in cnf else set()
+    stack = list(reachable)
+    while stack:
+        for body in cnf[stack.pop()]:
+            for symbol in body:
+                if symbol in cnf and symbol not in reachable:
+                    reachable.add(symbol)
+                    stack.append(symbol)
+    return reachable
+
+def prune_useless(cnf, start='K'):
+    """Remove non-generating symbols, then symbols unreachable from start."""
+    generating = generating_symbols(cnf)
+    cnf = {
+        head: [body for body in bodies if all(s in generating or s not in cnf for s in body)]
+        for head, bodies in cnf.items() if head in generating
+    }
+    reachable = reachable_symbols(cnf, start)
+    return {head: bodies for head, bodies in cnf.items() if head in reachable}
+
+def merge_equivalent(cnf, start='K'):
+    """Merge heads with identical rule sets until nothing changes.
+
+    Returns the merged grammar and a map from every removed head to the head
+    that replaced it.
+    """
+    aliases = {}
+    while True:
+        groups = {}
+        for head, bodies in cnf.items():
+            groups.setdefault(frozenset(map(tuple, bodies)), []).append(head)
+        renames = {}
+        for heads in groups.values():
+            if len(heads) > 1:
+                keep = start if start in heads else heads[0]
+                for head in heads:
+                    if head != keep:
+                        renames[head] = keep
+        if not renames:
+            return cnf, aliases
+        for old, new in list(aliases.items()):
+            aliases[old] = renames.get(new, new)
+        aliases.update(renames)
+        cnf = dedupe_bodies({
+            head: [[renames.get(s, s) for s in body] for body in bodies]
+            for head, bodies in cnf.items() if head not in renames
+        })
+
+def optimize_grammar(cnf, start='K'):
+    """Shrink a CNF grammar without changing the language of ``start``.
+
+    Returns ``(optimized, members, report)``: ``members`` maps each kept head
+    to the original heads it stands for, and ``report`` holds the grammar
+    size before and after.
+    """
+    before = grammar_size(cnf)
+    optimized = prune_useless(dedupe_bodies(cnf), start)
+    optimized, aliases = merge_equivalent(optimized, start)
+    members = {head: [head] for head in optimized}
+    for old, new in aliases.items():
+        members[new].append(old)
+    report = {"before": before, "after": grammar_size(optimized)}
+    return optimized, members, report
+
+def format_report(report):
+    """One line comparing grammar sizes, e.g. ``heads 40 -> 31, ...``."""
+    before, after = report["before"], report["after"]
+    return ", ".join(f"{name} {before[name]} -> {after[name]}" for name in before)
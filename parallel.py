@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from chart import TriangularChart, cyk_compact
+from cyk import compile_grammar
+from cyk_bitset import bitset_grammar, combine_cell
+
+# Below this many words the serial fill is faster than shipping diagonals
+PARALLEL_THRESHOLD = 80
+
+# by_left of the grammar loaded into a worker process
+_worker = {}
+
+def _init_worker(cnf, start):
+    _worker["by_left"] = bitset_grammar(compile_grammar(cnf, start)).by_left
+
+def _fill_in_worker(cells):
+    by_left = _worker["by_left"]
+    return [combine_cell(lefts, rights, by_left) for lefts, rights in cells]
+
+def _fill(by_left, cells):
+    return [combine_cell(lefts, rights, by_left) for lefts, rights in cells]
+
+class ParallelFiller:
+    """Fill each anti-diagonal of the chart across a thread or process pool.
+
+    Every cell of span length L depends only on shorter spans, so the cells
+    of one diagonal are split into chunks and combined concurrently. Each
+    task carries just the left and right masks its cells read. Sentences
+    shorter than ``threshold`` use the serial compact engine.
+    """
+
+    def __init__(self, compiled, workers=None, kind="process", threshold=PARALLEL_THRESHOLD):
+        self.bits = bitset_grammar(compiled)
+        self.workers = workers or os.cpu_count() or 1
+        self.threshold = threshold
+        self.kind = kind
+        if kind == "process":
+            self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                                initargs=(compiled.cnf, compiled.start))
+        elif kind == "thread":
+            self.executor = ThreadPoolExecutor(self.workers)
+        else:
+            raise ValueError(f"kind must be 'process' or 'thread', not {kind!r}")
+
+    def parse(self, words):
+        """Same result as ``cyk_compact(bits, words)``."""
+        n = len(words)
+        if n < self.threshold:
+            return cyk_compact(self.bits, words)
+
+        bits = self.bits
+        chart = TriangularChart(n, bits)
+        cells = chart.cells
+        index = chart.index
+        for i in range(n):
+            cells[index(i, i)] = bits.lexical.get(words[i], 0)
+
+        for length in range(2, n + 1):
+            spans = range(n - length + 1)
+            payload = []
+            for i in spans:
+                j = i + length - 1
+                row = index(i, i)
+                payload.append((cells[row:row + length - 1], [cells[index(k + 1, j)] for k in range(i, j)]))
+            size = -(-len(payload) // self.workers)
+            chunks = [payload[start:start + size] for start in range(0, len(payload), size)]
+            if self.kind == "process":
+                results = self.executor.map(_fill_in_worker, chunks)
+            else:
+                results = self.executor.map(_fill, [bits.by_left] * len(chunks), chunks)
+            i = 0
+            for masks in results:
+                for mask in masks:
+                    cells[index(i, i) + length - 1] = mask
+                    i += 1
+        return bool(cells[index(0, n - 1)] & bits.start_bit), chart
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def parallel_filler(compiled):
+    """A process-pool filler shared by all parses with this grammar.
+
+    Inside daemonic processes, such as ``multiprocessing.Pool`` workers,
+    which may not start processes of their own, a thread pool is used.
+    """
+    filler = compiled.derived.get("parallel")
+    if filler is None:
+        threshold = int(os.environ.get("BALI_PARALLEL_THRESHOLD", PARALLEL_THRESHOLD))
+        kind = "thread" if multiprocessing.current_process().daemon else "process"
+        filler = compiled.derived["parallel"] = ParallelFiller(compiled, kind=kind, threshold=threshold)
+    return filler
@@ -0,0 +1,53 @@
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+
+_DISABLED = nullcontext()
+
+@dataclass
+class ParseProfile:
+    """Phase timings (seconds) and hot-path counters for one parse.
+
+    Only engines that count their hot path set ``counted``; for the others
+    the counters are reported as None rather than as zeros.
+    """
+
+    phases: dict = field(default_factory=dict)
+    tokens: int = 0
+    rule_checks: int = 0
+    combinations: int = 0
+    populated_cells: int = 0
+    counted: bool = False
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block and add it to the named phase."""
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def as_dict(self):
+        """Plain dict with phase times in milliseconds, ready for JSON."""
+        return {
+            "phases_ms": {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()},
+            "tokens": self.tokens,
+            "rule_checks": self.rule_checks if self.counted else None,
+            "combinations": self.combinations if self.counted else None,
+            "populated_cells": self.populated_cells if self.counted else None,
+        }
+
+    def format(self):
+        """Human-readable summary for the CLI."""
+        lines = [f"  {name:<10} {seconds * 1000:10.3f} ms" for name, seconds in self.phases.items()]
+        if self.counted:
+            lines.append(f"  tokens={self.tokens} rule_checks={self.rule_checks} "
+                         f"combinations={self.combinations} populated_cells={self.populated_cells}")
+        else:
+            lines.append(f"  tokens={self.tokens} (this engine does not count its hot path)")
+        return "\n".join(lines)
+
+def phase(profile, name):
+    """``profile.phase(name)``, or a shared no-op when profiling is off."""
+    return _DISABLED if profile is None else profile.phase(name)
@@ -0,0 +1,81 @@
+from cyk_bitset import bitset_grammar, combine_cell
+
+class Reachability:
+    """Which nonterminals may cover a span, given where it sits in the sentence.
+
+    A span starting at word 0 lies on the leftmost path below the start
+    symbol, one ending at the last word on the rightmost path, and any other
+    span must be a child of some rule reachable from the start symbol.
+    """
+
+    def __init__(self, bits):
+        compiled = bits.compiled
+        start = compiled.start
+        rules_of = {}
+        for (B, C), heads in compiled.binary.items():
+            for head in heads:
+                rules_of.setdefault(head, []).append((B, C))
+
+        def closure(step):
+            found = set()
+            stack = [start]
+            while stack:
+                for child in step(rules_of.get(stack.pop(), ())):
+                    if child not in found:
+                        found.add(child)
+                        stack.append(child)
+            return found
+
+        self.start = bits.start_bit
+        self.prefix = bits.encode(closure(lambda rules: [B for B, _ in rules]))
+        self.suffix = bits.encode(closure(lambda rules: [C for _, C in rules]))
+        self.interior = bits.encode(closure(lambda rules: [s for body in rules for s in body]))
+
+    def allowed(self, i, j, n):
+        """Bitmask of nonterminals allowed on span [i][j] of an n-word sentence."""
+        if i == 0:
+            return self.start if j == n - 1 else self.prefix
+        return self.suffix if j == n - 1 else self.interior
+
+def reachability(compiled):
+    """Return the reachability filters of a compiled grammar, building them once."""
+    filters = compiled.derived.get("reachability")
+    if filters is None:
+        filters = compiled.derived["reachability"] = Reachability(bitset_grammar(compiled))
+    return filters
+
+def recognize(compiled, words):
+    """Only decide whether ``words`` is a sentence of the grammar.
+
+    Rejects out-of-vocabulary words before any chart work, keeps only
+    nonterminals that can appear at each span's position, and stops at the
+    first split of the root span that yields the start symbol.
+    """
+    n = len(words)
+    if n == 0:
+        return False
+    bits = bitset_grammar(compiled)
+    filters = reachability(compiled)
+
+    table = [[0] * n for _ in range(n)]
+    for i in range(n):
+        mask = bits.lexical.get(words[i], 0) & filters.allowed(i, i, n)
+        if not mask:
+            return False
+        table[i][i] = mask
+    if n == 1:
+        return True
+
+    by_left = bits.by_left
+    for length in range(2, n):
+        for i in range(n - length + 1):
+            j = i + length - 1
+            table[i][j] = combine_cell(table[i][i:j], [table[k+1][j] for k in range(i, j)], by_left) \
+                & filters.allowed(i, j, n)
+
+    # The root cell is never stored; any split producing the start symbol decides it
+    last = n - 1
+    for k in range(last):
+        if combine_cell((table[0][k],), (table[k+1][last],), by_left) & filters.start:
+            return True
+    return False
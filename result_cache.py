@@ -0,0 +1,102 @@
+import sys
+import threading
+from collections import OrderedDict
+
+def approximate_size(obj, seen=None):
+    """Rough deep size in bytes of built-in containers, strings and numbers.
+
+    Objects with an ``nbytes()`` method, such as ``TriangularChart``, add
+    the storage it reports.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approximate_size(k, seen) + approximate_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(approximate_size(item, seen) for item in obj)
+    elif callable(getattr(obj, "nbytes", None)):
+        size += obj.nbytes()
+    return size
+
+def cache_key(fingerprint, words, variant=None):
+    """Key of a parse result: grammar hash, variant (e.g. engine) and normalized tokens."""
+    return (fingerprint, variant, tuple(word.strip() for word in words if word.strip()))
+
+class ResultCache:
+    """Thread-safe LRU cache bounded by entry count and approximate memory."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entries=10000):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Return the cached value and mark it most recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """Store or refresh a value; evicts least recently used entries to fit.
+
+        Values are shared between threads and measured once, so they must
+        not be mutated after they are stored: put an updated copy instead.
+        """
+        size = approximate_size(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Hit/miss counters and current occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared_cache():
+    """The process-wide cache shared by all web sessions and service requests."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ResultCache()
+        return _shared
@@ -0,0 +1,343 @@
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from cfg_grammar import RULES_CFG
+from batch import BATCH_ENGINE, check_mapped, init_worker, parse_batch
+from engines import ENGINES
+from grammar_cache import binary_artifact, load_compiled
+from lexicon import lexicon
+from live_grammar import LiveGrammar
+from optimize import format_report
+from result_cache import cache_key, shared_cache
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+MAX_BODY = 10 * 1024 * 1024
+
+class MicroBatcher:
+    """Group concurrent sentences into batches sent to a worker pool.
+
+    A batch is dispatched when it reaches ``max_batch`` sentences or when
+    ``max_delay`` seconds have passed since its first sentence arrived.
+    """
+
+    def __init__(self, executor, max_batch=64, max_delay=0.005):
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.pending = []
+        self.timer = None
+        # Strong references so running batches are not garbage collected
+        self.running = set()
+        # Grammar edit log sent with every batch, see batch.apply_edits
+        self.edits = ()
+        self.batches = 0
+        self.batched_sentences = 0
+
+    async def submit(self, sentence):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((sentence, future))
+        if len(self.pending) >= self.max_batch:
+            self._dispatch()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.max_delay, self._dispatch)
+        return await future
+
+    def _dispatch(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        self.batches += 1
+        self.batched_sentences += len(batch)
+        task = asyncio.ensure_future(self._run(batch))
+        self.running.add(task)
+        task.add_done_callback(self.running.discard)
+
+    async def _run(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(self.executor, parse_batch, [sentence for sentence, _ in batch],
+                                                 self.edits)
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+class ParsingService:
+    """HTTP/JSON front end: /parse, /batch, /grammar, /health and /stats."""
+
+    def __init__(self, batcher, workers, engine, optimize=False, cache=None):
+        self.batcher = batcher
+        self.workers = workers
+        self.engine = engine
+        self.optimize = optimize
+        self.compiled = load_compiled(optimize=optimize)
+        # Built on the first grammar edit
+        self.live = None
+        self.edits = []
+        self.cache = cache
+        self.started = time.monotonic()
+        self.requests = 0
+        self.sentences = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=2048)
+
+    @property
+    def fingerprint(self):
+        return self.compiled.fingerprint
+
+    @property
+    def lexicon(self):
+        return lexicon(self.compiled)
+
+    def edit_grammar(self, payload):
+        """Apply ``{"edits": [{"action", "head", "body"}, ...]}`` without a restart.
+
+        Edits go to a ``LiveGrammar`` here and, through the edit log sent
+        with every batch, to each worker. They stop at the first one that
+        fails, which is answered with 400 and the number applied before it.
+        """
+        if self.optimize or self.engine == "mapped":
+            return 400, {"error": "grammar edits need the default grammar, without --optimize or --mmap"}
+        edits = payload.get("edits") if isinstance(payload, dict) else None
+        if not isinstance(edits, list) or not all(
+                isinstance(edit, dict) and edit.get("action") in ("add", "remove")
+                and isinstance(edit.get("head"), str) and isinstance(edit.get("body"), list)
+                and all(isinstance(symbol, str) for symbol in edit["body"]) for edit in edits):
+            return 400, {"error": "expected {\"edits\": [{\"action\": \"add\" or \"remove\", "
+                                  "\"head\": \"...\", \"body\": [\"...\", ...]}, ...]}"}
+        if self.live is None:
+            self.live = LiveGrammar(RULES_CFG, self.compiled.start)
+            self.compiled = self.live.compiled
+        status, response = 200, {}
+        for applied, edit in enumerate(edits):
+            try:
+                if edit["action"] == "add":
+                    self.live.add_rule(edit["head"], edit["body"])
+                else:
+                    self.live.remove_rule(edit["head"], edit["body"])
+            except (KeyError, ValueError) as exc:
+                status, response = 400, {"error": exc.args[0], "applied": applied}
+                break
+            self.edits.append((edit["action"], edit["head"], tuple(edit["body"])))
+        self.batcher.edits = tuple(self.edits)
+        return status, dict(response, grammar=self.fingerprint, edits=len(self.edits))
+
+    async def validate(self, sentence):
+        """Result for one sentence, from the cache or a micro-batch."""
+        if self.cache is None:
+            return await self.batcher.submit(sentence)
+        # Spelling variants of the same sentence share one entry
+        started = time.perf_counter()
+        key = cache_key(self.fingerprint, self.lexicon.normalize(sentence.split()), self.engine or "recognizer")
+        result = self.cache.get(key)
+        if result is None:
+            result = await self.batcher.submit(sentence)
+            self.cache.put(key, result)
+            return dict(result, sentence=sentence)
+        # The stored time_ms is the first request's parse; report this lookup instead
+        return dict(result, sentence=sentence, time_ms=round((time.perf_counter() - started) * 1000, 3), cached=True)
+
+    def stats(self):
+        uptime = time.monotonic() - self.started
+        latencies = sorted(self.latencies)
+
+        def percentile(q):
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 3) if latencies else None
+
+        return {
+            "uptime_s": round(uptime, 3),
+            "requests": self.requests,
+            "sentences": self.sentences,
+            "errors": self.errors,
+            "batches": self.batcher.batches,
+            "mean_batch_size": round(self.batcher.batched_sentences / self.batcher.batches, 2) if self.batcher.batches else 0,
+            "throughput_sentences_per_s": round(self.sentences / uptime, 3) if uptime else 0,
+            "latency_ms": {
+                "mean": round(statistics.fmean(latencies) * 1000, 3) if latencies else None,
+                "p50": percentile(0.5),
+                "p95": percentile(0.95),
+                "max": round(latencies[-1] * 1000, 3) if latencies else None,
+            },
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+    async def route(self, method, path, body):
+        """Return ``(status, payload)`` for one request."""
+        if path == "/health":
+            if method != "GET":
+                return 405, {"error": "use GET"}
+            return 200, {"status": "ok", "grammar": self.fingerprint,
+                         "engine": self.engine or "recognizer", "workers": self.workers}
+        if path == "/stats":
+            if method != "GET":
+                return 405, {"error": "use GET"}
+            return 200, self.stats()
+        if path not in ("/parse", "/batch", "/grammar"):
+            return 404, {"error": f"no route {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return 400, {"error": "body is not valid JSON"}
+
+        if path == "/grammar":
+            return self.edit_grammar(payload)
+
+        if path == "/parse":
+            sentence = payload.get("sentence") if isinstance(payload, dict) else None
+            if not isinstance(sentence, str):
+                return 400, {"error": "expected {\"sentence\": \"...\"}"}
+            self.sentences += 1
+            return 200, await self.validate(sentence)
+
+        sentences = payload.get("sentences") if isinstance(payload, dict) else None
+        if not isinstance(sentences, list) or not all(isinstance(s, str) for s in sentences):
+            return 400, {"error": "expected {\"sentences\": [\"...\", ...]}"}
+        self.sentences += len(sentences)
+        results = await asyncio.gather(*(self.validate(sentence) for sentence in sentences))
+        return 200, {"results": results}
+
+    async def handle(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection until it closes."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                started = time.perf_counter()
+                try:
+                    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    await self._reject(writer, 400, "malformed request line", started)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = headers.get("content-length") or "0"
+                if not length.isdecimal():
+                    # Without a usable length the body cannot be framed, so close
+                    await self._reject(writer, 400, "invalid Content-Length", started)
+                    break
+                length = int(length)
+                if length > MAX_BODY:
+                    await self._reject(writer, 413, "request body too large", started)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                self.requests += 1
+                try:
+                    status, payload = await self.route(method.upper(), target.split("?", 1)[0], body)
+                except Exception:
+                    status, payload = 500, {"error": "internal server error"}
+                if status != 200:
+                    self.errors += 1
+                self.latencies.append(time.perf_counter() - started)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _reject(self, writer, status, error, started):
+        """Count and answer a request that cannot be read, then close the connection."""
+        self.requests += 1
+        self.errors += 1
+        self.latencies.append(time.perf_counter() - started)
+        await self._respond(writer, status, {"error": error}, False)
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+def make_executor(workers, engine=BATCH_ENGINE, optimize=False, mapped=False):
+    """Process pool with the grammar loaded per worker; ``workers=0`` parses in a thread."""
+    # Warm the on-disk artifacts so workers load them instead of converting
+    load_compiled(optimize=optimize)
+    if mapped:
+        check_mapped(engine, optimize)
+        binary_artifact()
+    if workers == 0:
+        init_worker(engine, optimize, False, mapped)
+        return ThreadPoolExecutor(max_workers=1)
+    return ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                               initargs=(engine, optimize, False, mapped))
+
+async def serve(host="127.0.0.1", port=8000, workers=None, engine=BATCH_ENGINE, optimize=False,
+                max_batch=64, max_delay=0.005, ready=None, cache=True, mapped=False):
+    """Run the service until cancelled; ``ready`` receives the bound port."""
+    executor = make_executor(workers, engine, optimize, mapped)
+    # Mapped workers ignore the engine and parse off the binary grammar
+    service = ParsingService(MicroBatcher(executor, max_batch, max_delay), workers,
+                             "mapped" if mapped else engine, optimize,
+                             shared_cache() if cache else None)
+    server = await asyncio.start_server(service.handle, host, port)
+    bound_port = server.sockets[0].getsockname()[1]
+    if ready is not None:
+        ready(bound_port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON service for Balinese sentence validation.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000, help="0 picks a free port")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes; 0 parses in a thread")
+    parser.add_argument("--engine", default=BATCH_ENGINE, choices=sorted(ENGINES))
+    parser.add_argument("--recognize", action="store_true", help="only decide validity, without building charts")
+    parser.add_argument("--optimize", action="store_true", help="parse with the pruned and merged grammar")
+    parser.add_argument("--max-batch", type=int, default=64, help="sentences per micro-batch")
+    parser.add_argument("--max-delay-ms", type=float, default=5.0, help="longest wait to fill a micro-batch")
+    parser.add_argument("--no-cache", action="store_true", help="disable the LRU cache of repeated sentences")
+    parser.add_argument("--mmap", action="store_true", help="memory-map the binary grammar in every worker")
+    args = parser.parse_args(argv)
+
+    engine = None if args.recognize else args.engine
+    if args.mmap:
+        try:
+            check_mapped(engine, args.optimize)
+        except ValueError as exc:
+            parser.error(str(exc))
+    if args.optimize:
+        print(f"optimized grammar: {format_report(load_compiled(optimize=True).optimize_report)}", flush=True)
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, engine, args.optimize, args.max_batch,
+                          args.max_delay_ms / 1000,
+                          ready=lambda port: print(f"listening on http://{args.host}:{port}", flush=True),
+                          cache=not args.no_cache, mapped=args.mmap))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,39 @@
-import pandas as pd
+import html
+import time
+
+# Measured before the imports below so a cold start shows up in the sidebar
+_import_started = time.perf_counter()
+
 import streamlit as st
-from cnf import convert_to_cnf, remove_epsilon_productions, remove_unit_productions
-from cyk import cyk_algorithm, format_cell_content
+from cyk import build_display_table, cyk_indexed, cyk_steps, display_table_html
+from earley import earley_grammar, earley_tree
+from engines import DEFAULT_ENGINE, ENGINES, run_engine
+from forest import count_derivations, nth_tree
+from grammar_cache import grammar_hash, load_compiled
+from incremental import IncrementalParser
+from lexicon import lexicon
+from profiling import ParseProfile, phase
+from result_cache import cache_key, shared_cache
+from weighted import viterbi_cyk, weighted_grammar
 from cfg_grammar import RULES_CFG
-import graphviz
 
-def create_parse_tree(words, parse_table, grammar):
-    """Create parse tree visualization with complete derivation steps."""
+@st.cache_resource
+def cold_import_seconds():
+    """Import time of the first run in this server process, kept across reruns."""
+    return time.perf_counter() - _import_started
+
+# Reruns find the modules already loaded, so only the first measurement is kept
+IMPORT_SECONDS = cold_import_seconds()
+# Seconds between redraws of a chart that is still being filled
+PROGRESS_INTERVAL = 0.1
+# Enumerating the k-th tree walks k trees, so paging is capped
+MAX_TREE_PAGES = 1000
+
+def create_parse_tree(words, tree):
+    """Create parse tree visualization from a derivation extracted from the chart."""
+    # Imported here so reruns that draw no tree never load graphviz
+    import graphviz
+
     dot = graphviz.Digraph(comment='Parse Tree')
     dot.attr(rankdir='TB')
     node_count = 0
@@ -19,58 +46,44 @@ def create_parse_tree(words, parse_table, grammar):
         node_count += 1
         return node_id
 
-    def get_terminal_derivation(word, pos):
-        """Get complete derivation chain for a terminal."""
-        derivation = []
-        for head, bodies in grammar.items():
-            for body in bodies:
-                if isinstance(body, str) and body.lower() == word.lower():
-                    derivation.append(head)
-                    for parent_head, parent_bodies in grammar.items():
-                        for parent_body in parent_bodies:
-                            if isinstance(parent_body, list) and len(parent_body) == 1 and parent_body[0] == head:
-                                derivation.append(parent_head)
-        return list(reversed(derivation))
-
-    def build_tree(symbol, i, j, parent_id=None):
-        """Build tree showing all derivation steps."""
+    # Walk the tree iteratively; each node is visited once
+    stack = [(tree, None)] if tree else []
+    while stack:
+        (symbol, i, j, children), parent_id = stack.pop()
         current_id = add_node(symbol, f"({i+1},{j+1})")
-        
         if parent_id:
             dot.edge(parent_id, current_id)
+        if isinstance(children, str):
+            word_id = add_node(children)
+            dot.edge(current_id, word_id)
+        else:
+            for child in reversed(children):
+                stack.append((child, current_id))
 
-        if i == j:
-            derivation = get_terminal_derivation(words[i], i)
-            prev_id = current_id
-            
-            for category in derivation:
-                node_id = add_node(category, f"({i+1},{j+1})")
-                dot.edge(prev_id, node_id)
-                prev_id = node_id
-            
-            word_id = add_node(words[i])
-            dot.edge(prev_id, word_id)
-            return
-
-        for k in range(i, j):
-            for head, bodies in grammar.items():
-                if head != symbol:
-                    continue
-                for body in bodies:
-                    if not isinstance(body, list) or len(body) != 2:
-                        continue
-                    B, C = body
-                    if B in parse_table[i][k] and C in parse_table[k+1][j]:
-                        build_tree(B, i, k, current_id)
-                        build_tree(C, k+1, j, current_id)
-                        return
-
-    if 'K' in parse_table[0][len(words)-1]:
-        build_tree('K', 0, len(words)-1)
-    
     return dot
 
+# Streamlit keys these caches on the function source and arguments, so the
+# grammar hash is passed in for an edit to cfg_grammar.py to miss them
+
+@st.cache_resource
+def compiled_grammar(fingerprint):
+    """The compiled RULES_CFG, shared by every rerun and session."""
+    return load_compiled(RULES_CFG)
+
+@st.cache_data
+def rules_html(fingerprint, keys, arrow, separator):
+    """Expander entries for the rules of ``keys``, built once per grammar."""
+    entries = []
+    for lhs in keys:
+        rhs_list = RULES_CFG.get(lhs, [])
+        entries.append(
+            "<div style='background-color: white; padding: 0.75rem; border-radius: 0.5rem; margin-bottom: 0.5rem;'>"
+            f"<code>{lhs} {arrow} {separator.join([' '.join(rhs) for rhs in rhs_list])}</code></div>"
+        )
+    return "\n".join(entries)
+
 def main():
+    rerun_started = time.perf_counter()
     # Set page config
     st.set_page_config(
         page_title="Parsing Kalimat Bahasa Bali Berpredikat Frasa Numeralia",
@@ -156,33 +169,22 @@ def main():
         </p>
     """, unsafe_allow_html=True)
 
-    grammar_keys = ["K", "K1", "K2", "S", "NP", "P", "NumP", "Pel", "AdjP", "VP", "Ket", "PP"]
-    vocab_keys = ["PropNoun", "Pronoun", "Noun", "Adj", "Num", "V", "Prep", "Adv", "Det"]
+    fingerprint = grammar_hash(RULES_CFG)
+    grammar_keys = ("K", "K1", "K2", "S", "NP", "P", "NumP", "Pel", "AdjP", "VP", "Ket", "PP")
+    vocab_keys = ("PropNoun", "Pronoun", "Noun", "Adj", "Num", "V", "Prep", "Adv", "Det")
 
     # Grammar Rules section with improved styling
     with st.expander("📚 Lihat Aturan Tata Bahasa", expanded=False):
         st.markdown("""
             <h3 style='color: #1E3A8A; margin-bottom: 1rem;'>Aturan-aturan Tata Bahasa</h3>
         """, unsafe_allow_html=True)
-        for lhs in grammar_keys:
-            rhs_list = RULES_CFG.get(lhs, [])
-            st.markdown(f"""
-                <div style='background-color: white; padding: 0.75rem; border-radius: 0.5rem; margin-bottom: 0.5rem;'>
-                    <code>{lhs} → {' | '.join([' '.join(rhs) for rhs in rhs_list])}</code>
-                </div>
-            """, unsafe_allow_html=True)
+        st.markdown(rules_html(fingerprint, grammar_keys, "→", " | "), unsafe_allow_html=True)
       
     with st.expander("📚 Lihat Vocabulary Bahasa Bali", expanded=False):
         st.markdown("""
             <h3 style='color: #1E3A8A; margin-bottom: 1rem;'>Aturan-aturan Tata Bahasa</h3>
         """, unsafe_allow_html=True)
-        for lhs in vocab_keys:
-            rhs_list = RULES_CFG.get(lhs, [])
-            st.markdown(f"""
-                <div style='background-color: white; padding: 0.75rem; border-radius: 0.5rem; margin-bottom: 0.5rem;'>
-                    <code>{lhs} : {', '.join([' '.join(rhs) for rhs in rhs_list])}</code>
-                </div>
-            """, unsafe_allow_html=True)
+        st.markdown(rules_html(fingerprint, vocab_keys, ":", ", "), unsafe_allow_html=True)
                   
     # Input section with card-like styling
     st.markdown("""
@@ -200,55 +202,170 @@ def main():
         </div>
     """, unsafe_allow_html=True)
 
+    engine_names = sorted(ENGINES)
+    engine = st.sidebar.selectbox("Mesin parsing", engine_names, index=engine_names.index(DEFAULT_ENGINE))
+    profile = ParseProfile() if st.sidebar.checkbox("Tampilkan performa") else None
+    if profile is not None:
+        # Script imports are only slow on a cold start; later reruns reuse the loaded modules
+        last_rerun = st.session_state.get("last_rerun_ms")
+        st.sidebar.caption(f"Impor modul (start awal): {IMPORT_SECONDS * 1000:.1f} ms")
+        if last_rerun is not None:
+            st.sidebar.caption(f"Rerun sebelumnya: {last_rerun:.1f} ms")
+
     sentence = st.text_input("", placeholder="Masukkan kalimat dalam Bahasa Bali...")
+
+    # Live validation: only the columns of changed trailing words are recomputed
+    with phase(profile, "cnf"):
+        compiled = compiled_grammar(fingerprint)
+    live = st.session_state.get("live_parser")
+    if live is None or live.compiled is not compiled:
+        live = st.session_state["live_parser"] = IncrementalParser(compiled)
+    vocabulary = lexicon(compiled)
+    live.update(" ".join(vocabulary.normalize(sentence.split())))
+    if live.words:
+        unknown = vocabulary.unknown(live.words)
+        if unknown:
+            st.caption(f"❓ Kata tidak dikenal: {', '.join(unknown)}")
+        elif live.is_valid:
+            st.caption("✅ Sejauh ini kalimat sudah valid")
+        else:
+            st.caption("⏳ Kalimat belum valid, lanjutkan mengetik...")
    
+    # Keep the checked sentence across reruns so the parse trees can be paged
     if st.button("Periksa Kalimat"):
-        if sentence:
-            words = sentence.strip().split()
+        st.session_state["checked_sentence"] = sentence
+    sentence = st.session_state.get("checked_sentence", "")
+    # Spelling variants (case, "galak2") map to the grammar's words before anything is cached
+    words = vocabulary.normalize(sentence.split())
+    unknown = vocabulary.unknown(words)
+
+    if unknown:
+        # No rule produces these words, so suggest spellings instead of running the parser
+        items = []
+        for word in unknown:
+            suggestions = vocabulary.suggest(word)
+            hint = f" — mungkin maksudnya: <em>{', '.join(suggestions)}</em>" if suggestions else ""
+            items.append(f"<li><strong>{html.escape(word)}</strong>{hint}</li>")
+        st.markdown(f"""
+            <div style='background-color: #FDE2E2; color: #9B1C1C; padding: 1rem; border-radius: 0.5rem; margin: 2rem 0;'>
+                ❌ Kalimat <strong>"{html.escape(sentence)}."</strong> TIDAK VALID: kata berikut tidak ada dalam kosakata
+                <ul>{''.join(items)}</ul>
+            </div>
+        """, unsafe_allow_html=True)
+
+    if sentence and not unknown:
+        # Results are shared across sessions and never mutated: table HTML, backpointers and
+        # tree DOT are added by putting an updated copy as they are rendered
+        cache = shared_cache()
+        key = cache_key(compiled.fingerprint, words, engine)
+
+        with st.spinner("🔍 Memproses kalimat..."):
+            # Display parse table with improved styling
+            st.markdown("""
+                <h2 style='color: #1E3A8A; margin-top: 2rem; margin-bottom: 1rem; text-align: center;'>Tabel Filling</h2>
+            """, unsafe_allow_html=True)
+            table_slot = st.empty()
+
+            entry = cache.get(key)
+            if entry is None:
+                back = None
+                if engine == "indexed":
+                    # Redraw the chart as each span length is filled, at most every PROGRESS_INTERVAL
+                    is_valid, parse_table, back = False, [], []
+                    last_render = time.perf_counter()
+                    for length, parse_table, back in cyk_steps(compiled, words, backpointers=True, profile=profile):
+                        if length < len(words) and time.perf_counter() - last_render >= PROGRESS_INTERVAL:
+                            with phase(profile, "render"):
+                                partial = build_display_table(words, parse_table, filled=length)
+                                table_slot.write(display_table_html(partial), unsafe_allow_html=True)
+                            last_render = time.perf_counter()
+                    is_valid = bool(words) and compiled.start in parse_table[0][-1]
+                elif engine == "viterbi":
+                    # Only the best derivation of each head is kept, so the one tree is the best parse
+                    with phase(profile, "parse"):
+                        is_valid, parse_table, back = viterbi_cyk(weighted_grammar(compiled), words)
+                else:
+                    is_valid, parse_table = run_engine(compiled, words, engine, profile)
+                entry = {"is_valid": is_valid, "parse_table": parse_table, "back": back, "trees": {}}
+                cache.put(key, entry)
+            is_valid, parse_table, back = entry["is_valid"], entry["parse_table"], entry["back"]
             
-            with st.spinner("🔍 Memproses kalimat..."):
-                cnf = convert_to_cnf(remove_unit_productions(remove_epsilon_productions(RULES_CFG)))
-                is_valid, parse_table = cyk_algorithm(cnf, words)
-                
-                # Display parse table with improved styling
-                st.markdown("""
-                    <h2 style='color: #1E3A8A; margin-top: 2rem; margin-bottom: 1rem; text-align: center;'>Tabel Filling</h2>
+            with phase(profile, "render"):
+                table_html = entry.get("table_html")
+                if table_html is None:
+                    # Cell strings go straight into the HTML, without a DataFrame
+                    table_html = display_table_html(build_display_table(words, parse_table))
+                    entry = dict(entry, table_html=table_html)
+                    cache.put(key, entry)
+                table_slot.write(table_html, unsafe_allow_html=True)
+
+            if is_valid:
+                st.markdown(f"""
+                    <div style='background-color: #DEF7EC; color: #03543F; padding: 1rem; border-radius: 0.5rem; margin: 2rem 0; text-align: center;'>
+                        ✅ Kalimat <strong>"{sentence}."</strong> VALID menurut tata bahasa Bali
+                    </div>
                 """, unsafe_allow_html=True)
                 
-                display_table = []
-                n = len(words)
-                for i in range(n + 1):
-                    display_table.append([""] * n)
-                display_table[n] = words.copy()
-                for i in range(n):
-                    for j in range(n - i):
-                        display_table[n-1-i][j] = format_cell_content(parse_table[j][j + i])
-
-                df = pd.DataFrame(display_table)
-                st.write(df.to_html(index=False, header=False, classes='dataframe'), unsafe_allow_html=True)
-
-                if is_valid:
-                    st.markdown(f"""
-                        <div style='background-color: #DEF7EC; color: #03543F; padding: 1rem; border-radius: 0.5rem; margin: 2rem 0; text-align: center;'>
-                            ✅ Kalimat <strong>"{sentence}."</strong> VALID menurut tata bahasa Bali
-                        </div>
-                    """, unsafe_allow_html=True)
-                    
+                # Trees are only built on request, so the verdict shows up first
+                if st.checkbox("Tampilkan pohon parsing", key="show_tree"):
                     st.markdown("""
                         <h2 class='parse-tree-title'>Pohon Parsing</h2>
                     """, unsafe_allow_html=True)
-                    
+                
                     # Wrap the graphviz chart in a centered container
                     st.markdown("<div class='parse-tree-container'>", unsafe_allow_html=True)
-                    dot = create_parse_tree(words, parse_table, cnf)
-                    st.graphviz_chart(dot)
+                    with phase(profile, "tree"):
+                        if engine == "earley":
+                            # Earley trees keep the source grammar's unit chains
+                            parse_count = 1
+                        else:
+                            parse_count = entry.get("parse_count")
+                            if back is None or parse_count is None:
+                                if back is None:
+                                    _, _, back = cyk_indexed(compiled, words, backpointers=True)
+                                parse_count = count_derivations(back, compiled.start)
+                                entry = dict(entry, back=back, parse_count=parse_count)
+                                cache.put(key, entry)
+                    tree_index = 1
+                    if parse_count > 1:
+                        st.markdown(f"""
+                            <p style='text-align: center; color: #4B5563;'>Kalimat ini ambigu: ditemukan <strong>{parse_count}</strong> pohon parsing</p>
+                        """, unsafe_allow_html=True)
+                        tree_index = st.number_input("Pohon parsing ke-", min_value=1, max_value=min(parse_count, MAX_TREE_PAGES), value=1)
+                    with phase(profile, "tree"):
+                        dot_source = entry["trees"].get(tree_index)
+                        if dot_source is None:
+                            if back is None:
+                                tree = earley_tree(earley_grammar(compiled), words, parse_table)
+                            else:
+                                tree = nth_tree(back, words, tree_index - 1, compiled.start)
+                            dot_source = create_parse_tree(words, tree).source
+                            entry = dict(entry, trees={**entry["trees"], tree_index: dot_source})
+                            cache.put(key, entry)
+                    with phase(profile, "render"):
+                        st.graphviz_chart(dot_source)
                     st.markdown("</div>", unsafe_allow_html=True)
-                else:
-                    st.markdown(f"""
-                        <div style='background-color: #FDE2E2; color: #9B1C1C; padding: 1rem; border-radius: 0.5rem; margin: 2rem 0; text-align: center;'>
-                            ❌ Kalimat <strong>"{sentence}."</strong> TIDAK VALID menurut tata bahasa Bali
-                        </div>
-                    """, unsafe_allow_html=True)
-                    
+            else:
+                st.markdown(f"""
+                    <div style='background-color: #FDE2E2; color: #9B1C1C; padding: 1rem; border-radius: 0.5rem; margin: 2rem 0; text-align: center;'>
+                        ❌ Kalimat <strong>"{sentence}."</strong> TIDAK VALID menurut tata bahasa Bali
+                    </div>
+                """, unsafe_allow_html=True)
+
+        if profile is not None:
+            with st.expander("⏱️ Performa", expanded=False):
+                stats = profile.as_dict()
+                # Engines other than indexed do not count their hot path
+                counters = " · ".join(f"{name}={'–' if stats[name] is None else stats[name]}"
+                                      for name in ("tokens", "rule_checks", "combinations", "populated_cells"))
+                st.table({"Fase": list(stats["phases_ms"]), "Waktu (ms)": list(stats["phases_ms"].values())})
+                cache_stats = cache.stats()
+                st.markdown(f"""
+                    <code>{counters}</code><br>
+                    <code>cache: hits={cache_stats['hits']} · misses={cache_stats['misses']} · entries={cache_stats['entries']} · bytes={cache_stats['bytes']}</code>
+                """, unsafe_allow_html=True)
+
+    st.session_state["last_rerun_ms"] = (time.perf_counter() - rerun_started) * 1000
+                
 if __name__ == "__main__":
     main()
\ No newline at end of file
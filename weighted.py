@@ -0,0 +1,204 @@
+import argparse
+import heapq
+import math
+import time
+
+from cfg_grammar import RULE_SCORES
+
+def rule_score(scores, head, body, bodies):
+    """Log probability of ``head -> body`` out of ``bodies`` alternatives."""
+    probability = scores.get((head, tuple(body)), 1 / bodies)
+    if not 0 < probability <= 1:
+        raise ValueError(f"probability of {head} -> {' '.join(body)} must be in (0, 1], got {probability}")
+    return math.log(probability)
+
+class WeightedGrammar:
+    """A CFG converted to CNF with a log score on every rule.
+
+    Long bodies are binarized with ``T<word>`` and ``X<n>`` helpers scored
+    0, and unit chains are folded into the rules they end in, adding up
+    the best chain score. The source grammar must be epsilon-free.
+    """
+
+    def __init__(self, cfg, start='K', scores=None):
+        scores = RULE_SCORES if scores is None else scores
+        self.start = start
+        own_lexical = {head: {} for head in cfg}  # head -> {word: score}
+        own_binary = {head: {} for head in cfg}   # head -> {(B, C): score}
+        units = {head: {} for head in cfg}        # head -> {target: score}
+        binarized = {}
+        helpers = 0
+
+        def keep_best(table, key, score):
+            if score > table.get(key, -math.inf):
+                table[key] = score
+
+        for head, bodies in cfg.items():
+            for body in bodies:
+                if not body:
+                    raise ValueError("weighted grammars must be epsilon-free")
+                score = rule_score(scores, head, body, len(bodies))
+                if len(body) == 1:
+                    symbol = body[0]
+                    keep_best(units[head] if symbol in cfg else own_lexical[head], symbol, score)
+                    continue
+                pair = binarized.get(tuple(body))
+                if pair is None:
+                    symbols = []
+                    for symbol in body:
+                        if symbol not in cfg:
+                            own_lexical.setdefault(f"T{symbol}", {})[symbol] = 0.0
+                            symbol = f"T{symbol}"
+                        symbols.append(symbol)
+                    pair = (symbols[-2], symbols[-1])
+                    for symbol in reversed(symbols[:-2]):
+                        helper = f"X{helpers}"
+                        helpers += 1
+                        own_binary[helper] = {pair: 0.0}
+                        pair = (symbol, helper)
+                    binarized[tuple(body)] = pair
+                keep_best(own_binary[head], pair, score)
+
+        # closure[A][X]: best score of a unit chain A =>* X (Bellman-Ford)
+        closure = {head: {head: 0.0} for head in set(own_lexical) | set(own_binary)}
+        for _ in range(len(cfg) + 1):
+            changed = False
+            for head, targets in units.items():
+                best = closure[head]
+                for target, score in targets.items():
+                    for symbol, chain in list(closure[target].items()):
+                        if score + chain > best.get(symbol, -math.inf):
+                            best[symbol] = score + chain
+                            changed = True
+            if not changed:
+                break
+        else:
+            raise ValueError("unit productions form a cycle with a positive score")
+
+        # word -> {head: score}, B -> {C: {head: score}}
+        self.lexical = {}
+        self.by_left = {}
+        for head, chains in closure.items():
+            for symbol, chain in chains.items():
+                for word, score in own_lexical.get(symbol, {}).items():
+                    keep_best(self.lexical.setdefault(word, {}), head, chain + score)
+                for (B, C), score in own_binary.get(symbol, {}).items():
+                    keep_best(self.by_left.setdefault(B, {}).setdefault(C, {}), head, chain + score)
+
+def weighted_grammar(compiled):
+    """Return the weighted form of a compiled grammar's source CFG, building it once."""
+    grammar = compiled.derived.get("weighted")
+    if grammar is None:
+        if compiled.source is None:
+            raise ValueError("weighted parsing needs the source CFG of the compiled grammar")
+        grammar = compiled.derived["weighted"] = WeightedGrammar(compiled.source, compiled.start)
+    return grammar
+
+def prune(cell, beam=None, threshold=None):
+    """Keep the ``beam`` best heads, and those within ``threshold`` of the best."""
+    if threshold is not None and cell:
+        floor = max(cell.values()) - threshold
+        cell = {head: score for head, score in cell.items() if score >= floor}
+    if beam is not None and len(cell) > beam:
+        cell = dict(heapq.nlargest(beam, cell.items(), key=lambda item: item[1]))
+    return cell
+
+def viterbi_cyk(grammar, words, beam=None, threshold=None):
+    """CYK that keeps each head's best log score per cell.
+
+    Returns ``(is_valid, scores, back)``: ``scores[i][j]`` maps heads to
+    their best score and ``back`` has one backpointer per head in the
+    ``cyk_indexed`` format, so ``extract_tree`` yields the best parse.
+    ``beam`` (top-k) and ``threshold`` (log-score distance to the cell's
+    best) prune every cell before it is combined further; without them the
+    result is exact.
+    """
+    n = len(words)
+    scores = [[{} for j in range(n)] for i in range(n)]
+    back = [[{} for j in range(n)] for i in range(n)]
+    if n == 0:
+        return False, scores, back
+
+    for i in range(n):
+        scores[i][i] = prune(grammar.lexical.get(words[i], {}), beam, threshold)
+        back[i][i] = dict.fromkeys(scores[i][i])
+
+    by_left = grammar.by_left
+    for length in range(2, n + 1):
+        for i in range(n - length + 1):
+            j = i + length - 1
+            cell = {}
+            cell_back = {}
+            for k in range(i, j):
+                right = scores[k+1][j]
+                if not right:
+                    continue
+                for B, left_score in scores[i][k].items():
+                    rules = by_left.get(B)
+                    if not rules:
+                        continue
+                    for C, right_score in right.items():
+                        heads = rules.get(C)
+                        if not heads:
+                            continue
+                        for head, score in heads.items():
+                            score += left_score + right_score
+                            if score > cell.get(head, -math.inf):
+                                cell[head] = score
+                                cell_back[head] = [(k, B, C)]
+            scores[i][j] = cell = prune(cell, beam, threshold)
+            back[i][j] = {head: cell_back[head] for head in cell}
+    return grammar.start in scores[0][n-1], scores, back
+
+def beam_study(cfg, beams, lengths, count=20, seed=0, threshold=None):
+    """Time and recall of beam-pruned Viterbi against the exact pass.
+
+    Recall is the share of grammatical sentences still accepted; ``best``
+    is the share whose best start-symbol score is unchanged.
+    """
+    from bench import SentenceGenerator
+
+    grammar = WeightedGrammar(cfg)
+    generator = SentenceGenerator(cfg, max_length=max(lengths), seed=seed)
+    rows = []
+    for length in lengths:
+        sentences = [s for s in (generator.generate(length) for _ in range(count)) if s]
+        if not sentences:
+            continue
+        exact = []
+        started = time.perf_counter()
+        for words in sentences:
+            exact.append(viterbi_cyk(grammar, words)[1][0][-1].get(grammar.start))
+        exact_seconds = time.perf_counter() - started
+        rows.append({"length": length, "beam": None, "sentences": len(sentences), "seconds": exact_seconds,
+                     "recall": 1.0, "best": 1.0})
+        for beam in beams:
+            accepted = same = 0
+            started = time.perf_counter()
+            for words, want in zip(sentences, exact):
+                got = viterbi_cyk(grammar, words, beam, threshold)[1][0][-1].get(grammar.start)
+                accepted += got is not None
+                same += got == want
+            rows.append({"length": length, "beam": beam, "sentences": len(sentences), "seconds": time.perf_counter() - started,
+                         "recall": accepted / len(sentences), "best": same / len(sentences)})
+    return rows
+
+def main(argv=None):
+    from cfg_grammar import RULES_CFG
+
+    parser = argparse.ArgumentParser(description="Measure the speed/accuracy trade-off of beam-pruned Viterbi CYK.")
+    parser.add_argument("--beams", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--threshold", type=float, help="also drop heads this far below the cell's best log score")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10, 20, 40])
+    parser.add_argument("--count", type=int, default=20, help="sentences per length")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{'length':>6} {'beam':>6} {'ms/sent':>10} {'recall':>7} {'best':>7}")
+    for row in beam_study(RULES_CFG, args.beams, args.lengths, args.count, args.seed, args.threshold):
+        beam = "exact" if row["beam"] is None else row["beam"]
+        per_sentence = row["seconds"] * 1000 / row["sentences"]
+        print(f"{row['length']:>6} {beam:>6} {per_sentence:>10.3f} {row['recall']:>7.2f} {row['best']:>7.2f}")
+
+if __name__ == "__main__":
+    main()